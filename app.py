@@ -1,150 +1,455 @@
+import functools
+import time
+from datetime import timedelta
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import requests
-from google.oauth2.service_account import Credentials
-import gspread
+from gspread.utils import extract_id_from_url
+
+from dashboard.charts import (
+    PAYLOAD_BUDGET,
+    dev_time_figure,
+    dev_velocity_figure,
+    figure_payload_bytes,
+    pr_comment_count_figure,
+    pr_duration_figure,
+    pr_resolution_figure,
+    repo_facet as repo_facet_args,
+    dev_time_trend_figure,
+    risk_figure,
+    risk_trend_figure,
+    task_distribution_figure,
+    task_pr_figure,
+    velocity_figure,
+    velocity_trend_figure,
+)
+from dashboard.graphql_loader import fetch_repos_graphql
+from dashboard.instrument import cache_metrics, registry, timed
+from dashboard.metrics import sprint_metrics
+from dashboard.normalize import add_pr_durations, normalize_pulls
+from dashboard.repos import parse_repo_input, repo_label
+from dashboard.service import FrameService, secrets_context, split_budget
+from dashboard.settings import frame_cache, github_client, repo_store, sheets_client
+from dashboard.sheets import fetch_revision, fetch_worksheets
+from dashboard.sync import DEFAULT_SYNC_INTERVAL, BackgroundSync, iter_sync_repos, repo_key, sync_progress
+from dashboard.tickets import link_tasks_to_prs, pr_ticket_index, task_pr_summary, ticket_pattern
+from dashboard.trend import load_sprint_trend
+from dashboard.warmup import WarmupScheduler, describe_age, warm_worksheet, warm_worksheets, warmup_targets
 
 
 st.set_page_config(layout="wide")
 st.title("Welcome to Data Visualisation Dashboard")
 
 
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+USERNAME = st.secrets["google"]["USERNAME"]
 
+# how long sheet metadata and sheet contents are cached; sheet and PR frames are
+# also bounded by CACHE_MAX_MB, GraphQL results, org listings and sprint trends by entry count
+SHEET_METADATA_TTL = 30
+SHEET_TABLE_TTL = 300
+GITHUB_CACHE_ENTRIES = 16
 
-SERVICE_ACCOUNT_FILE = {
-    "type": st.secrets["google"]["type"],
-    "project_id": st.secrets["google"]["project_id"],
-    "private_key_id": st.secrets["google"]["private_key_id"],
-    "private_key": st.secrets["google"]["private_key"],
-    "client_email": st.secrets["google"]["client_email"],
-    "client_id": st.secrets["google"]["client_id"],
-    "auth_uri": st.secrets["google"]["auth_uri"],
-    "token_uri": st.secrets["google"]["token_uri"],
-    "auth_provider_x509_cert_url": st.secrets["google"]["auth_provider_x509_cert_url"],
-    "client_x509_cert_url": st.secrets["google"]["client_x509_cert_url"],
-    "universe_domain": st.secrets["google"]["universe_domain"]
-  }      #'service_account.json'
-credentials = Credentials.from_service_account_info(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-gc = gspread.authorize(credentials)
+# how often the preview chart is redrawn while a first crawl is streaming in, in seconds
+PREVIEW_INTERVAL = 1.0
+
+# "rest" syncs PRs and comments into the local store, "graphql" loads 100 PRs per request
+GITHUB_LOADER = st.secrets["google"].get("GITHUB_LOADER", "rest")
+
+# DEBUG_PANEL (or ?debug=1 in the URL) shows stage timings, HTTP counts and cache
+# hit rates in the sidebar; METRICS_PATH is rewritten in Prometheus text format after every run
+DEBUG_PANEL = st.secrets["google"].get("DEBUG_PANEL", False) or st.query_params.get("debug") == "1"
+METRICS_PATH = st.secrets["google"].get("METRICS_PATH")
+
+# SERVICE_PROCESSES > 0 moves GitHub syncs, PR frames and sprint metrics to that many
+# worker processes serving every session, which then only wait on finished results;
+# 0 does the work in each session's script thread
+SERVICE_PROCESSES = int(st.secrets["google"].get("SERVICE_PROCESSES", 0))
+
+# TICKET_KEYS (e.g. ["ABC", "TASK"]) links tasks to PRs only by those project keys;
+# without it any key of two or more letters counts
+TICKET_PATTERN = ticket_pattern(st.secrets["google"].get("TICKET_KEYS"))
+
+
+# one client per server process, so GITHUB_MAX_WORKERS and the GITHUB_HOURLY_BUDGET
+# pacing are shared by every session; in serving mode it gets one share of the budget
+# like each worker, as warm-up, org listings and GraphQL still run here
+@st.cache_resource
+def get_github_client():
+    secrets = st.secrets["google"]
+    return github_client(split_budget(dict(secrets), SERVICE_PROCESSES) if SERVICE_PROCESSES else secrets)
+
+
+@st.cache_resource
+def get_repo_store():
+    return repo_store(st.secrets["google"])
+
+
+@st.cache_resource
+def get_background_sync():
+    return BackgroundSync(get_github_client(), get_repo_store())
+
+
+# repos (WARM_REPOS, same format as the input box) and sheet URLs (WARM_SHEETS) kept
+# fresh in the local store by a background thread, started once per server process
+# when any are configured; `python -m dashboard warmup` does the same headless. They
+# are parsed here, under the page's guard, so a bad WARM_SHEETS URL only stops the warm-up
+@st.cache_resource
+def get_warmup_scheduler():
+    repos, orgs, spreadsheet_ids = warmup_targets(st.secrets["google"])
+    if not (repos or orgs or spreadsheet_ids):
+        return None
+    http_client = get_sheets_client().http_client if spreadsheet_ids else None
+    return WarmupScheduler(
+        get_github_client(), get_repo_store(), dict.fromkeys(repos), spreadsheet_ids, http_client, orgs=orgs
+    ).start()
+
+
+# PR frames, at most one per repo, shared with the other server processes through CACHE_DIR
+@st.cache_resource
+def get_repo_frames():
+    return frame_cache(st.secrets["google"], 'repo_frames', shared=True)
+
+
+# keyed on the sync time, so a finished delta sync replaces the cached frame
+def get_repo_data(owner, repo_name, synced_at):
+    return get_repo_frames().get_or_load(
+        (owner, repo_name, synced_at),
+        lambda: get_repo_store().repo_frame(repo_key(owner, repo_name)),
+        group=(owner, repo_name),
+    )
+
+
+# the worker pool of the serving mode, or None without it; its PR frames share
+# get_repo_frames' cache, and results live for SHEET_TABLE_TTL like sheet frames
+@st.cache_resource
+def get_frame_service():
+    if not SERVICE_PROCESSES:
+        return None
+    secrets = st.secrets["google"]
+    return FrameService(
+        functools.partial(secrets_context, dict(secrets), SERVICE_PROCESSES),
+        get_repo_store(),
+        SERVICE_PROCESSES,
+        frames=get_repo_frames(),
+        results=frame_cache(secrets, 'service_results', ttl=SHEET_TABLE_TTL),
+    )
+
+
+@cache_metrics('get_repos_data_graphql', st.cache_data(ttl=DEFAULT_SYNC_INTERVAL, max_entries=GITHUB_CACHE_ENTRIES))
+def get_repos_data_graphql(repos):
+    return fetch_repos_graphql(get_github_client(), repos)
+
+
+@cache_metrics('list_org_repos', st.cache_data(ttl=DEFAULT_SYNC_INTERVAL, max_entries=GITHUB_CACHE_ENTRIES))
+def list_org_repos(owner):
+    return get_github_client().list_repos(owner)
+
+
+# crawl repos with a progress bar, drawing the PR Duration donut from the PRs stored
+# so far; returns the new sync state of each repo
+def sync_with_progress(repos):
+    progress = st.progress(0.0, text="Loading from GitHub...")
+    preview = st.empty()
+    done = dict.fromkeys(repos, 0.0)
+    partial = []
+    fresh = False
+    states = {}
+    last_drawn = float('-inf')  # the first page is drawn as soon as it arrives
+    # each draw gets its own key: an identical figure (one page of PRs, or a repeated
+    # empty page) would otherwise clash with itself or the PR Duration chart drawn later
+    draws = 0
+    for event in iter_sync_repos(get_github_client(), get_repo_store(), repos):
+        repo = event['repo']
+        done[repo] = sync_progress(event)
+        if event['stage'] == 'done':
+            states[repo] = event['state']
+            continue
+        if event['stage'] == 'pulls':
+            partial.append(normalize_pulls([event['pulls']]).assign(Repo=repo_label(*repo, USERNAME)))
+            fresh = True
+        progress.progress(
+            sum(done.values()) / len(repos),
+            text=f"Loading {repo_key(*repo)} from GitHub: {event['stage']} page {event['page']}",
+        )
+        # redraw only when new PRs came in, and at most every PREVIEW_INTERVAL
+        if fresh and time.monotonic() - last_drawn >= PREVIEW_INTERVAL:
+            partial = [pd.concat(partial, ignore_index=True)]
+            with preview.container():
+                st.caption(f"{len(partial[0])} PRs loaded so far; comment counts follow once every PR is in")
+                st.plotly_chart(pr_duration_figure(add_pr_durations(partial[0])), key=f"pr-preview-{draws}")
+            draws += 1
+            fresh = False
+            last_drawn = time.monotonic()
+    progress.empty()
+    preview.empty()
+    return states
+
+
+# render from the local store straight away; only repos seen for the first time, or
+# every repo when a refresh was asked for, wait on GitHub
+def load_repos(repos, refresh=False):
+    if GITHUB_LOADER == "graphql":
+        if refresh:
+            get_repos_data_graphql.clear()
+        return get_repos_data_graphql(repos), []
+
+    # no streamed preview here: first crawls run on the workers, in parallel
+    service = get_frame_service()
+    if service is not None:
+        with st.spinner("Loading from GitHub..."):
+            loaded = service.load_repos(repos, refresh)
+        return [frame for _, frame in loaded], [state for state, _ in loaded]
+
+    store = get_repo_store()
+    states = {repo: store.sync_state(repo_key(*repo)) for repo in repos}
+    cold = [repo for repo, state in states.items() if state is None or refresh]
+    if cold:
+        with timed('github_crawl'):
+            states.update(sync_with_progress(cold))
+    for repo in repos:
+        if repo not in cold:
+            get_background_sync().request(*repo)
+    frames = [get_repo_data(owner, repo_name, states[(owner, repo_name)]['synced_at']) for owner, repo_name in repos]
+    return frames, [states[repo] for repo in repos]
+
+
+# the PR side of the task matcher, rebuilt only when the loaded PRs change; the
+# frame itself isn't hashed, `key` stands for it
+@cache_metrics('get_ticket_index', st.cache_data(max_entries=GITHUB_CACHE_ENTRIES))
+def get_ticket_index(key, _repo_df):
+    return pr_ticket_index(_repo_df, TICKET_PATTERN)
+
+
+# built once per process on first use, so reruns and the GitHub-only path never pay for Google auth
+@st.cache_resource
+def get_sheets_client():
+    return sheets_client(st.secrets["google"])
+
+
+@cache_metrics('get_worksheets', st.cache_data(ttl=SHEET_METADATA_TTL))
+def get_worksheets(spreadsheet_id):
+    return fetch_worksheets(get_sheets_client().http_client, spreadsheet_id)
+
+
+@cache_metrics('get_sheet_revision', st.cache_data(ttl=SHEET_METADATA_TTL))
+def get_sheet_revision(spreadsheet_id):
+    return fetch_revision(get_sheets_client().http_client, spreadsheet_id)
+
+
+# sheet frames, at most one per worksheet; the local store is their disk tier
+@st.cache_resource
+def get_sheet_tables():
+    return frame_cache(st.secrets["google"], 'sheet_tables', ttl=SHEET_TABLE_TTL)
+
+
+# keyed on the revision, so an edited sheet is re-read on the next rerun; without
+# Drive access the revision is None and the TTL alone bounds staleness. Reads go
+# through the local store, so a sheet warmed in the background isn't fetched again
+def get_sheet_table(spreadsheet_id, worksheet, revision):
+    def load():
+        store = get_repo_store()
+        warm_worksheet(
+            get_sheets_client().http_client, store, spreadsheet_id, worksheet, revision, timedelta(seconds=SHEET_TABLE_TTL)
+        )
+        return store.sheet_table(spreadsheet_id, worksheet['title'])
+
+    return get_sheet_tables().get_or_load(
+        (spreadsheet_id, worksheet['title'], revision), load, group=(spreadsheet_id, worksheet['title'])
+    )
+
+
+# every worksheet as a sprint, keyed on the revision like get_sheet_table; stale
+# worksheets are reloaded in one batch and only new or changed sprints summarized again
+@cache_metrics('get_sprint_trend', st.cache_data(ttl=SHEET_TABLE_TTL, max_entries=GITHUB_CACHE_ENTRIES))
+def get_sprint_trend(spreadsheet_id, revision):
+    return load_sprint_trend(
+        get_sheets_client().http_client, get_repo_store(), spreadsheet_id, get_worksheets(spreadsheet_id), revision,
+        timedelta(seconds=SHEET_TABLE_TTL),
+    )
+
+
+# reload worksheets now, in one batch, and drop every cached copy of them
+def refresh_sheets(spreadsheet_id, worksheets):
+    get_sheet_revision.clear()
+    get_sprint_trend.clear()
+    for worksheet in worksheets:
+        get_sheet_tables().discard((spreadsheet_id, worksheet['title']))
+    revision = get_sheet_revision(spreadsheet_id)
+    warm_worksheets(get_sheets_client().http_client, get_repo_store(), spreadsheet_id, worksheets, revision, force=True)
+
+
+# process-wide instrumentation, as tables in the sidebar
+def show_debug_panel():
+    st.sidebar.subheader("Debug: this server process")
+    timers = pd.DataFrame(
+        [
+            (labels.pop('stage'), ', '.join(labels.values()), count, total, total / count * 1000, longest * 1000, last * 1000)
+            for name, labels, count, total, longest, last in registry.timers()
+            if name == 'stage_seconds'
+        ],
+        columns=['stage', 'detail', 'calls', 'total s', 'mean ms', 'max ms', 'last ms'],
+    )
+    st.sidebar.write("**Stage timings**")
+    st.sidebar.dataframe(timers.sort_values('total s', ascending=False), hide_index=True)
+
+    counters = registry.counters()
+    http = pd.DataFrame(
+        [(labels['service'], labels['status'], value) for name, labels, value in counters if name == 'http_requests_total'],
+        columns=['service', 'status', 'requests'],
+    )
+    received = {labels['service']: value for name, labels, value in counters if name == 'http_response_bytes_total'}
+    st.sidebar.write("**HTTP requests**")
+    st.sidebar.dataframe(http, hide_index=True)
+    st.sidebar.caption(', '.join(f"{service}: {size / 2 ** 20:.1f} MiB received" for service, size in received.items()))
+
+    calls = {labels['cache']: value for name, labels, value in counters if name == 'cache_calls_total'}
+    misses = {labels['cache']: value for name, labels, value in counters if name == 'cache_misses_total'}
+    held = {labels['cache']: value for name, labels, value in registry.gauges() if name == 'cache_bytes'}
+    caches = pd.DataFrame(
+        [
+            (cache, count, count - misses.get(cache, 0), 1 - misses.get(cache, 0) / count,
+             held[cache] / 2 ** 20 if cache in held else None)
+            for cache, count in calls.items()
+        ],
+        columns=['cache', 'calls', 'hits', 'hit rate', 'MiB held'],
+    )
+    st.sidebar.write("**Caches**")
+    st.sidebar.dataframe(caches, hide_index=True)
+    st.sidebar.download_button("Prometheus metrics", registry.prometheus_text(), file_name="dashboard.prom")
+
+
+# Plotly JSON size of every chart drawn in this run
+chart_payloads = []
+
+
+# build, serialize and draw one chart, each step timed under the chart's name
+def show_chart(name, build, *args):
+    with timed('chart_build', chart=name):
+        fig = build(*args)
+    with timed('chart_serialize', chart=name):
+        chart_payloads.append(figure_payload_bytes(fig))
+    with timed('chart_render', chart=name):
+        st.plotly_chart(fig)
 
-USERNAME = st.secrets["google"]["USERNAME"]
-TOKEN = st.secrets["google"]["TOKEN"]
-
-# base URL
-BASE_URL = "https://api.github.com"
-
-
-
-# fetch pr for a specific repository
-@st.cache_data
-def fetch_pull_requests(repo_name):
-    url = f"{BASE_URL}/repos/{USERNAME}/{repo_name}/pulls?state=all"     
-    prs = []
-    while url:
-        response = requests.get(url, auth=(USERNAME, TOKEN))
-        prs += response.json()
-        url = response.links.get('next', {}).get('url')  
-    return prs
-
-# Function to fetch comments for a specific PR
-@st.cache_data
-def fetch_pr_comments(repo_name, pr_number):
-    url = f"{BASE_URL}/repos/{USERNAME}/{repo_name}/issues/{pr_number}/comments"
-    comments = []
-    while url:
-        response = requests.get(url, auth=(USERNAME, TOKEN))
-        comments += response.json()
-        url = response.links.get('next', {}).get('url')  
-    return comments
-
-
-@st.cache_data
-def get_repo_data(repo_name):
-    repo_data = []
-    prs = fetch_pull_requests(repo_name)
-    for pr in prs:
-        comments = fetch_pr_comments(repo_name, pr['number'])
-        if comments:
-            first_comment_created_at = comments[0]['created_at']
-        repo_data.append({
-            'PR Number': pr['number'],
-            'PR Title': pr['title'],
-            'PR State': pr['state'],
-            'Created At': pr['created_at'],
-            'Updated At': pr['updated_at'],
-            'Merged At': pr['merged_at'],
-            'First Comment At': first_comment_created_at,
-        })
-
-    df = pd.DataFrame(repo_data)
-    return df
-
-
-def get_repo_name_from_url(repo_url):
-    repo_name = repo_url.split('/')[-1]
-    return repo_name
 
 # Input fields 
-repo_url = st.text_input("Enter the GitHub repository URL or the repository name:")
+repo_url = st.text_input("Enter the GitHub repository URL or the repository name (several separated by commas, or org:NAME for a whole organization):")
 shared_url = st.text_input("Enter the URL for the Google Sheet:")
 st.write("Please share the private Google Sheet with this email: pratikingle09@data-visualization-436504.iam.gserviceaccount.com")
 
+# a failure to start the warm-up (e.g. Google auth for WARM_SHEETS) mustn't take the page down
+try:
+    warmup = get_warmup_scheduler()
+except Exception as e:
+    warmup = None
+    st.caption(f"Background warm-up could not start: {e or type(e).__name__}")
+refresh = st.button("Refresh data", help="Fetch the latest GitHub and sheet data now instead of waiting for the next background sync")
+if warmup is not None:
+    last_round = f"last round {describe_age(warmup.last_run)}" if warmup.last_run else "first round running"
+    st.caption(
+        f"Background warm-up of {len(warmup.repos)} repos and {len(warmup.spreadsheet_ids)} sheets, {last_round}"
+        + (f" (failed: {warmup.last_error})" if warmup.last_error else "")
+    )
+service = get_frame_service()
+if service is not None and service.last_error:
+    st.caption(f"Worker processes: last job failed {describe_age(service.last_error_at)}: {service.last_error}")
+
 
 
 
 
 if repo_url or shared_url:
     try:
+        repos = []
         if repo_url:
-            if "github.com" in repo_url:
-                repo_name = get_repo_name_from_url(repo_url)
-            else:
-                repo_name = repo_url 
-            
+            repos, orgs = parse_repo_input(repo_url, USERNAME)
+            for org in orgs:
+                repos += [(org, name) for name in list_org_repos(org)]
+            repos = list(dict.fromkeys(repos))
+            # an org without (non-archived) repos, or input like ","
+            if not repos:
+                st.info(f"No repositories found for {', '.join(orgs) if orgs else repr(repo_url)}.")
+
+        if repos:
             generateForGithub=True
-            repo_df = get_repo_data(repo_name)
-            
-            repo_df['PR Title'] = repo_df['PR Title']
-            
-            repo_df['PR Opened Date'] = pd.to_datetime(repo_df['Created At'], utc=True).dt.tz_convert(None)
-            
-            repo_df['PR Merged Date'] = pd.to_datetime(repo_df['Merged At'], utc=True).dt.tz_convert(None)
-            
-            repo_df['First Comment At'] = pd.to_datetime(repo_df['First Comment At'], utc=True).dt.tz_convert(None)
+            frames, sync_states = load_repos(repos, refresh)
+            repo_df = pd.concat(
+                [frame.assign(Repo=repo_label(owner, repo_name, USERNAME)) for (owner, repo_name), frame in zip(repos, frames)],
+                ignore_index=True,
+            )
+            # facet the PR charts by repo when more than one is loaded
+            repo_facet = repo_facet_args(len(repos))
             
-            repo_df['PR Duration'] = (repo_df['PR Merged Date'] - repo_df['PR Opened Date']).dt.total_seconds() / 3600
+            with timed('add_pr_durations'):
+                repo_df = add_pr_durations(repo_df)
             
-            repo_df['PR Comments Resolved Duration'] = (repo_df['PR Merged Date'] - repo_df['First Comment At']).dt.total_seconds() / 3600
-            
-            repo_df['total Comments in Pr'] = repo_df.apply(lambda row: len(fetch_pr_comments(repo_name, row['PR Number'])), axis=1)
+            if sync_states:
+                oldest_sync = min(state['synced_at'] for state in sync_states)
+                sync_requests = sum(state['request_count'] or 0 for state in sync_states)
+                st.caption(
+                    f"GitHub data as of {oldest_sync}, {describe_age(oldest_sync)} "
+                    f"(GitHub API requests in last sync: {sync_requests})"
+                )
+            if get_frame_service() is not None:
+                st.caption(f"Served by {SERVICE_PROCESSES} worker processes")
+            else:
+                github_stats = get_github_client().stats
+                st.caption(
+                    f"GitHub client since start: {github_stats['requests']} requests, {github_stats['retries']} retries, "
+                    f"{github_stats['throttled_seconds']:.1f}s throttled"
+                )
         else:
             generateForGithub=False 
          
         if shared_url:
             generateForSheet=True
-            # Open Google Sheets and get worksheets
-            tables = gc.open_by_url(shared_url)
-            worksheets = tables.worksheets()  # Get all worksheets
-            worksheet_names = [ws.title for ws in worksheets]  # Extract titles
+            # Get the worksheets of the Google Sheet
+            spreadsheet_id = extract_id_from_url(shared_url)
+            worksheets = get_worksheets(spreadsheet_id)
+            worksheet_names = [ws['title'] for ws in worksheets]  # Extract titles
             selected_sheet = st.selectbox("Select a sheet to visualize:", worksheet_names)
+            trend_mode = st.toggle(
+                "Sprint trends across all worksheets",
+                help="Treat every worksheet as a sprint and chart velocity, dev time difference and risks across them",
+            )
 
             # Load the selected worksheet into a DataFrame
-            selected_worksheet = tables.worksheet(selected_sheet)
-            data = selected_worksheet.get_all_values()
-            headers = data.pop(0) 
-            table = pd.DataFrame(data, columns=headers)
+            selected_worksheet = worksheets[worksheet_names.index(selected_sheet)]
+            service = get_frame_service()
+            if refresh and service is None:
+                refresh_sheets(spreadsheet_id, worksheets if trend_mode else [selected_worksheet])
+            elif refresh:
+                get_sheet_revision.clear()
+            revision = get_sheet_revision(spreadsheet_id)
+            with timed('sprint_metrics'):
+                if service is None:
+                    sprint = sprint_metrics(get_sheet_table(spreadsheet_id, selected_worksheet, revision))
+                else:
+                    sprint = service.sprint_metrics(spreadsheet_id, selected_worksheet, revision, force=refresh)
+            sheet_state = get_repo_store().sheet_state(spreadsheet_id, selected_sheet)
+            if sheet_state:
+                st.caption(f"Sheet data as of {sheet_state['loaded_at']}, {describe_age(sheet_state['loaded_at'])}")
 
             # Example visualization (you can customize this part)
             st.subheader(f"Data from sheet: {selected_sheet}")
-            table['Actual'] = pd.to_numeric(table['ACTUAL'], errors='coerce')  # convert to numeric, 'coerce' will turn invalid parsing into NaN
-            table['ESTIMATE'] = pd.to_numeric(table['ESTIMATE'], errors='coerce')
-            
-            table['Dev Time Difference'] = table['Actual'] - table['ESTIMATE']
+
+            trend = None
+            if trend_mode:
+                with timed('sprint_trend'):
+                    if service is None:
+                        trend = get_sprint_trend(spreadsheet_id, revision)
+                    else:
+                        trend = service.sprint_trend(spreadsheet_id, worksheets, revision, force=refresh)
         else:
             generateForSheet=False
+
+        # link sheet tasks to PRs by the ticket IDs in task names and PR titles or branches
+        if generateForGithub and generateForSheet:
+            with timed('link_tasks'):
+                ticket_index = get_ticket_index(
+                    (tuple(repos), len(repo_df), repo_df['Updated At'].max(), TICKET_PATTERN.pattern), repo_df
+                )
+                task_prs = task_pr_summary(link_tasks_to_prs(sprint['tasks'], repo_df, ticket_index, TICKET_PATTERN))
         
         
         
@@ -169,34 +474,11 @@ if repo_url or shared_url:
             # Sprint Velocity
             
             if generateForSheet:
-                velocity_table = table.dropna(subset=['Actual'])
-                total_estimate = velocity_table['ESTIMATE'].sum()
-                total_actual = velocity_table['Actual'].sum()
-                velocity = total_actual / total_estimate
-
-                time_difference = total_estimate - total_actual
-                hours = int(abs(time_difference))
-                minutes = int((abs(time_difference) - hours) * 60)
-
-                if velocity > 0:
-                    if hours > 0:
-                        time_status = f" Ahead of Time by {hours} hour{'s' if hours > 1 else ''} {minutes} minute{'s' if minutes != 1 else ''}"
-                    else:
-                        time_status = f"**Ahead of Time** by {minutes} minute{'s' if minutes != 1 else ''}"
-                elif time_difference < 0:
-                    if hours > 0:
-                        time_status = f"**Behind Schedule** by {hours} hour{'s' if hours > 1 else ''} {minutes} minute{'s' if minutes != 1 else ''}"
-                    else:
-                        time_status = f"**Behind Schedule** by {minutes} minute{'s' if minutes != 1 else ''}"
-                else:
-                    time_status = "**On Time**"
-
-                # Developer contributions
-                dev_contributions = table.groupby('ASSIGNEE').agg(
-                    total_estimate=('ESTIMATE', 'sum'),
-                    total_actual=('Actual', 'sum')
-                ).reset_index()
-                dev_contributions['velocity'] = dev_contributions['total_actual'] / dev_contributions['total_estimate']
+                total_estimate = sprint['total_estimate']
+                total_actual = sprint['total_actual']
+                time_status = sprint['time_status']
+                dev_contributions = sprint['dev_contributions']
+                tasks = sprint['tasks']
 
                 
                 
@@ -206,31 +488,10 @@ if repo_url or shared_url:
                 
                 
                 with col1:
-                    velocity_fig = px.bar(
-                        x=['Estimated', 'Actual'],
-                        y=[total_estimate, total_actual],
-                        labels={'x': 'Type of Effort', 'y': 'Effort (hours/story points)'},
-                        title='Team Sprint Velocity ' f"Sprint status: {time_status}",
-                        text=[total_estimate, total_actual],
-                        color=['Estimated', 'Actual'],
-                    )
-                    velocity_fig.update_layout(bargap=0.7)
-                    velocity_fig.update_traces(textposition='outside')
-                    velocity_fig.update_layout(showlegend=False, xaxis_title='', yaxis_title='Effort (hours)')
-                    st.plotly_chart(velocity_fig)
+                    show_chart('Velocity', velocity_figure, total_estimate, total_actual, time_status)
 
                 with col2:
-                    dev_velocity_fig = px.bar(
-                        dev_contributions,
-                        x='ASSIGNEE',
-                        y=['total_estimate', 'total_actual'],
-                        barmode='group',
-                        title='Individual Developer Velocity',
-                        text_auto=True,
-                        labels={'variable': 'Type of Effort', 'value': 'Effort (hours)'},
-                    )
-                    dev_velocity_fig.update_layout(yaxis_title='Effort (hours)', xaxis_title='Developer')
-                    st.plotly_chart(dev_velocity_fig)
+                    show_chart('Developer Velocity', dev_velocity_figure, dev_contributions)
 
                         
                         
@@ -249,60 +510,13 @@ if repo_url or shared_url:
                         \text{Dev Time} = {\text{Total Actual Time}}
                         """)
                         
-                    table['TASK-NAME'] = table['TASK_NAME'].str.slice(0, 10) + '...'
-                    dev_time_fig = px.bar(
-                        table,
-                        x='TASK-NAME',
-                        y='Actual',
-                        title="Dev Time",
-                        hover_data={'TASK-NAME': False,'TASK_NAME': True}
-                    )
-                    #dev_time_fig.update_traces(marker_color='yellow')
-                    dev_time_fig.update_layout(xaxis_title='Task Name', yaxis_title='Dev Time (hours)')
-                    st.plotly_chart(dev_time_fig)
+                    show_chart('Dev Time', dev_time_figure, tasks)
                     
                 with col6:    
-                    table['RISKS'] = table['RISKS'].str.lower()
-                    risk_counts = table['RISKS'].value_counts().reset_index()
-                    risk_counts.columns = ['Risk Type', 'Count']
-
-                    color_map = {
-                    'risk': 'red',      
-                    'no risks': 'green',  
-                    'not yet identified': 'yellow'    
-                    }
-
-                    fig = px.pie(risk_counts, names='Risk Type', values='Count', title='Risk Distribution', color_discrete_map=color_map)
-                    fig.update_traces(marker=dict(colors=['green', 'red', 'yellow']))
-                    st.plotly_chart(fig)
+                    show_chart('Risk Distribution', risk_figure, sprint['risk_counts'])
                 with col7:
                     
-                    table['SHORT_TASK_NAME'] = table['TASK_NAME'].str.slice(0, 10) + '...'
-                    
-                    table['PULL'] = 0  
-                    table.loc[table['Actual'].isna(), 'PULL'] = 0.1 
-
-                    
-                    fig = px.pie(
-                    table,
-                    names='SHORT_TASK_NAME',  
-                    values='ESTIMATE',
-                    title='Task Distribution',
-                    hover_data={'TASK_NAME': False},  # Prevent hover_data from showing
-                    
-                    )
-
-                
-                    fig.update_traces(
-                        pull=table['PULL'],
-                        textposition='inside',
-                        textinfo='label+value',  
-                        textfont_size=14, 
-                        hovertemplate='%{customdata[0]}<br>Estimate: %{value}hr',  
-                        customdata=table[['TASK_NAME']],  
-                        )
-
-                    st.plotly_chart(fig)
+                    show_chart('Task Distribution', task_distribution_figure, tasks)
                     st.caption("if the task is pulled from rest of the chart it indicates that the task not able to complet in this sprint")
 
             # <-- custome rule:PR Efficiency Visualization -->
@@ -322,30 +536,11 @@ if repo_url or shared_url:
                         \text{Time for PR} = {\text{Last Pr Merged At}} - {\text{First Pr Created At}}
                         """)
                         
-                    # Calculate the time between the first PR created and last PR merged
-                    first_pr_created_at = repo_df['PR Opened Date'].min()
-                    last_pr_merged_at = repo_df['PR Merged Date'].max()
-
-                    # Compute the total duration in hours
-                    pr_total_duration = (last_pr_merged_at - first_pr_created_at).total_seconds() / 3600
-                    
-
                     # Show the result
                     st.write(f"**Total time taken for merging all PRs: **")
 
-
-                    labels = repo_df['PR Title']
-                    values = repo_df['PR Duration']
-                    
-                    fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=0.5)])
-
-                    # Update layout to add text inside the hollow area
-                    fig.update_layout(
-                        annotations=[dict(text=f"{pr_total_duration:.2f} hours", x=0.5, y=0.5, font_size=20, showarrow=False)]
-                    )
-
                     # Display the chart in Streamlit
-                    st.plotly_chart(fig)
+                    show_chart('PR Duration', pr_duration_figure, repo_df)
                     
         
 
@@ -371,15 +566,7 @@ if repo_url or shared_url:
                         """)
                         
                         
-                    pr_comments_fig = px.bar(
-                        repo_df,
-                        x='PR Title',
-                        y='PR Comments Resolved Duration',
-                        title="PR Comments Resolved Duration"
-                    )
-                    pr_comments_fig.update_layout(bargap=0.5)
-                    pr_comments_fig.update_layout(xaxis_title='PR Title', yaxis_title='Resolution Time (hours)')
-                    st.plotly_chart(pr_comments_fig)
+                    show_chart('PR Comments Resolved', pr_resolution_figure, repo_df, repo_facet)
                     
                     
                 with col9:
@@ -398,23 +585,49 @@ if repo_url or shared_url:
                         \text{Number of PR Comments} = {\text{Total Comments in Pr}}
                         """)
                     
-                    pr_comments_fig = px.bar(
-                        repo_df,
-                        x='PR Title',
-                        y='total Comments in Pr',
-                        title="PR Comments Count"
-                    )
-                    pr_comments_fig.update_traces(marker_color='lightgray')
-                    pr_comments_fig.update_layout(bargap=0.6)
-                    pr_comments_fig.update_layout(xaxis_title='PR Title', yaxis_title='total Comments in Pr', yaxis=dict(
-                    tickmode='linear',  
-                    tick0=0,            
-                    dtick=1           
-                ))
-                    st.plotly_chart(pr_comments_fig)
+                    show_chart('PR Comments Count', pr_comment_count_figure, repo_df, repo_facet)
                 
                 
                 
+            # <-- Sprint trends: one point per worksheet -->
+            if generateForSheet and trend is not None:
+                st.write("### Sprint Trends")
+                if trend.empty:
+                    st.info("No worksheet has the TASK_NAME, ASSIGNEE, ESTIMATE, ACTUAL and RISKS columns of a sprint.")
+                else:
+                    st.caption(f"{len(trend)} sprints, in worksheet order")
+                    trend_col1, trend_col2, trend_col3 = st.columns(3)
+                    with trend_col1:
+                        show_chart('Velocity Trend', velocity_trend_figure, trend)
+                    with trend_col2:
+                        show_chart('Dev Time Difference Trend', dev_time_trend_figure, trend)
+                    with trend_col3:
+                        show_chart('Risk Trend', risk_trend_figure, trend)
+
+            # <-- Tasks and PRs: sheet tasks linked to PRs by ticket ID -->
+            if generateForGithub and generateForSheet:
+                st.write("### Tasks and PRs")
+                with st.expander("### Tasks and PRs: Click to view data source & formula"):
+                    st.write("**Data Source**: Google Sheet and GitHub API, linked by ticket IDs such as ABC-123 "
+                             "in the task name and the PR title or branch")
+                    st.write("**Formula**:")
+                    st.latex(r"""
+                    \text{PR Duration} = {\text{Last PR Merged At}} - {\text{First PR Created At}} \quad \text{per task}
+                    """)
+                if task_prs.empty:
+                    st.info("No task name shares a ticket ID with a PR title or branch.")
+                else:
+                    st.caption(f"{len(task_prs)} of {len(sprint['tasks'])} tasks linked to PRs by ticket ID")
+                    show_chart('Tasks and PRs', task_pr_figure, task_prs)
+
+            # keep the Plotly JSON sent to the browser under budget
+            payload_total = sum(chart_payloads)
+            payload_note = f"Chart payload: {payload_total / 1024:.0f} KB across {len(chart_payloads)} charts"
+            if payload_total > PAYLOAD_BUDGET:
+                st.warning(f"{payload_note}, over the {PAYLOAD_BUDGET / 1024:.0f} KB budget")
+            else:
+                st.caption(payload_note)
+                
             #col10,col11=st.columns(2)    
             
                 
@@ -502,3 +715,8 @@ if repo_url or shared_url:
         st.error(f"An error occurred: {e}")
 else:
     st.warning("Please enter both the GitHub repository URL and Google Sheet URL.")
+
+if METRICS_PATH:
+    registry.write_prometheus(METRICS_PATH)
+if DEBUG_PANEL:
+    show_debug_panel()
@@ -0,0 +1,63 @@
+import argparse
+import time
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from benchmarks.mock_github import make_repo
+from benchmarks.mock_sheets import make_sheet
+from dashboard import charts
+from dashboard.github_client import summarize_comments
+from dashboard.metrics import compute_sprint_metrics
+from dashboard.normalize import add_pr_durations, normalize_pulls
+
+
+# Figure payload size and build+serialize time for the PR and task charts:
+# one mark per row (the previous charts) vs the aggregating rendering layer.
+#
+#   python -m benchmarks.bench_charts --prs 100 1000 10000
+
+
+def per_row_figures(repo_df, tasks):
+    return [
+        go.Figure(data=[go.Pie(labels=repo_df['PR Title'], values=repo_df['PR Duration'], hole=0.5)]),
+        px.bar(repo_df, x='PR Title', y='PR Comments Resolved Duration'),
+        px.bar(repo_df, x='PR Title', y='total Comments in Pr'),
+        px.bar(tasks, x='TASK-NAME', y='Actual'),
+        px.pie(tasks, names='SHORT_TASK_NAME', values='ESTIMATE'),
+    ]
+
+
+def layered_figures(repo_df, tasks):
+    return [
+        charts.pr_duration_figure(repo_df),
+        charts.pr_resolution_figure(repo_df, {}),
+        charts.pr_comment_count_figure(repo_df, {}),
+        charts.dev_time_figure(tasks),
+        charts.task_distribution_figure(tasks),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prs', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'charts':<10} {'payload KB':>11} {'seconds':>8}")
+    for size in args.prs:
+        repo = make_repo(size)
+        comment_summary = summarize_comments(c for comments in repo['comments'].values() for c in comments)
+        repo_df = add_pr_durations(normalize_pulls([repo['prs']], comment_summary))
+        sheet = make_sheet(size)
+        tasks = compute_sprint_metrics(pd.DataFrame(sheet[1:], columns=sheet[0]))['tasks']
+
+        for name, build in [('per-row', per_row_figures), ('layered', layered_figures)]:
+            start = time.perf_counter()
+            payload = sum(charts.figure_payload_bytes(fig) for fig in build(repo_df, tasks))
+            elapsed = time.perf_counter() - start
+            print(f"{size:>7} {name:<10} {payload / 1024:>11.0f} {elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import time
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient, summarize_comments
+
+
+# Wall-clock time and request count of a full PR + comment crawl against the
+# local mock server at increasing worker counts, per-PR vs repo-wide comments.
+#
+#   python -m benchmarks.bench_concurrency --prs 500 --latency 0.02
+
+
+def crawl_per_pr(client):
+    prs = client.fetch_pull_requests('owner', 'repo')
+    client.fetch_comments_for_prs('owner', 'repo', [pr['number'] for pr in prs])
+
+
+def crawl_repo_wide(client):
+    client.fetch_pull_requests('owner', 'repo')
+    summarize_comments(client.fetch_repo_comments('owner', 'repo'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prs', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    with MockGitHub(make_repo(args.prs), latency=args.latency) as server:
+        for name, crawl in [('per-PR comments', crawl_per_pr), ('repo-wide comments', crawl_repo_wide)]:
+            print(name)
+            print(f"{'workers':>8} {'requests':>9} {'seconds':>8} {'speedup':>8}")
+            baseline = None
+            for workers in args.workers:
+                client = GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=None, max_workers=workers)
+                start = time.perf_counter()
+                crawl(client)
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                print(f"{workers:>8} {client.request_count:>9} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
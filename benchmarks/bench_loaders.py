@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient
+from dashboard.graphql_loader import fetch_pull_requests_graphql
+from dashboard.normalize import normalize_graphql_nodes
+from dashboard.store import RepoStore
+from dashboard.sync import repo_key, sync_repo
+
+
+# Cold load of one repo through the REST sync and the GraphQL loader against
+# the local mock server; checks both produce the same frame.
+#
+#   python -m benchmarks.bench_loaders --prs 2000 --latency 0.05
+
+
+def load_rest(client, directory):
+    store = RepoStore(os.path.join(directory, 'github.sqlite3'))
+    sync_repo(client, store, 'owner', 'repo')
+    return store.repo_frame(repo_key('owner', 'repo'))
+
+
+def load_graphql(client, directory):
+    return normalize_graphql_nodes(fetch_pull_requests_graphql(client, 'owner', 'repo'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prs', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds added to every response")
+    args = parser.parse_args()
+
+    frames = {}
+    with MockGitHub(make_repo(args.prs), latency=args.latency) as server:
+        print(f"{'loader':<8} {'requests':>9} {'seconds':>8}")
+        for name, load in [('rest', load_rest), ('graphql', load_graphql)]:
+            client = GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=None)
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                frames[name] = load(client, directory)
+                elapsed = time.perf_counter() - start
+            print(f"{name:<8} {client.request_count:>9} {elapsed:>8.2f}")
+
+    pd.testing.assert_frame_equal(frames['rest'], frames['graphql'])
+    print("frames identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.mock_sheets import make_sheet
+from dashboard.metrics import compute_sprint_metrics, sprint_metrics
+
+
+# Sprint aggregates per Visualize click: the previous inline computation vs
+# compute_sprint_metrics vs a memo hit on an unchanged sheet.
+#
+#   python -m benchmarks.bench_metrics --rows 10 1000 50000
+
+
+def previous_inline(table):
+    table = table.copy()
+    table['Actual'] = pd.to_numeric(table['ACTUAL'], errors='coerce')
+    table['ESTIMATE'] = pd.to_numeric(table['ESTIMATE'], errors='coerce')
+    table['Dev Time Difference'] = table['Actual'] - table['ESTIMATE']
+    velocity_table = table.dropna(subset=['Actual'])
+    velocity_table['ESTIMATE'].sum() and velocity_table['Actual'].sum()
+    dev_contributions = table.groupby('ASSIGNEE').agg(
+        total_estimate=('ESTIMATE', 'sum'),
+        total_actual=('Actual', 'sum')
+    ).reset_index()
+    dev_contributions['velocity'] = dev_contributions['total_actual'] / dev_contributions['total_estimate']
+    table['TASK-NAME'] = table['TASK_NAME'].str.slice(0, 10) + '...'
+    table['RISKS'] = table['RISKS'].str.lower()
+    table['RISKS'].value_counts().reset_index()
+    table['SHORT_TASK_NAME'] = table['TASK_NAME'].str.slice(0, 10) + '...'
+    table['PULL'] = 0.0
+    table.loc[table['Actual'].isna(), 'PULL'] = 0.1
+
+
+def best_of(func, table, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(table)
+        samples.append(time.perf_counter() - start)
+    return min(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 1000, 50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'inline ms':>10} {'compute ms':>11} {'memo hit ms':>12}")
+    for rows in args.rows:
+        sheet = make_sheet(rows)
+        table = pd.DataFrame(sheet[1:], columns=sheet[0])
+        inline = best_of(previous_inline, table, args.repeat)
+        compute = best_of(compute_sprint_metrics, table, args.repeat)
+        sprint_metrics(table)
+        memo = best_of(sprint_metrics, table, args.repeat)
+        print(f"{rows:>7} {inline:>10.2f} {compute:>11.2f} {memo:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
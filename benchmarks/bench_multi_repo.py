@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient
+from dashboard.store import RepoStore
+from dashboard.sync import sync_repo, sync_repos
+
+
+# Cold ingestion of an org's repos one after another vs side by side, with
+# one deliberately slow repo; the parallel time should track the slowest repo.
+#
+#   python -m benchmarks.bench_multi_repo --repos 40 --prs 300
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repos', type=int, default=40)
+    parser.add_argument('--prs', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument('--slow-latency', type=float, default=0.2, help="extra seconds per response for the slowest repo")
+    parser.add_argument('--workers', type=int, default=32, help="client requests in flight")
+    args = parser.parse_args()
+
+    repos = {f"org/repo{i}": make_repo(args.prs + 10 * i) for i in range(args.repos)}
+    slowest = f"org/repo{args.repos - 1}"
+
+    with MockGitHub(repos=repos, latency=args.latency, repo_latency={slowest: args.slow_latency}) as server:
+        client = GitHubClient('org', 'token', base_url=server.base_url, max_workers=args.workers, hourly_budget=None)
+        names = [('org', name) for name in client.list_repos('org')]
+
+        print(f"{'mode':<22} {'repos':>6} {'seconds':>8}")
+        with tempfile.TemporaryDirectory() as directory:
+            store = RepoStore(os.path.join(directory, 'github.sqlite3'))
+            start = time.perf_counter()
+            sync_repo(client, store, 'org', slowest.split('/')[1])
+            print(f"{'slowest repo alone':<22} {1:>6} {time.perf_counter() - start:>8.2f}")
+
+        for mode in ['sequential', 'parallel']:
+            with tempfile.TemporaryDirectory() as directory:
+                store = RepoStore(os.path.join(directory, 'github.sqlite3'))
+                start = time.perf_counter()
+                if mode == 'parallel':
+                    sync_repos(client, store, names)
+                else:
+                    for owner, name in names:
+                        sync_repo(client, store, owner, name)
+                print(f"{mode:<22} {len(names):>6} {time.perf_counter() - start:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
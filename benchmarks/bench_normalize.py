@@ -0,0 +1,95 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.mock_github import make_repo
+from dashboard.github_client import summarize_comments
+from dashboard.normalize import add_pr_durations, normalize_pulls
+
+
+# Raw PR pages to the charted frame: the previous row-by-row dicts plus three
+# to_datetime passes, vs the one-pass typed normalization. Reports wall time,
+# peak traced memory and the resulting frame's size.
+#
+#   python -m benchmarks.bench_normalize --sizes 10000 100000
+
+
+# the fields a real pulls listing carries that the dashboard never reads
+PADDING = {
+    'url': 'https://api.github.com/repos/owner/repo/pulls/1',
+    'body': 'A description of the change.\n' * 8,
+    'user': {'login': 'someone', 'id': 1, 'type': 'User', 'site_admin': False},
+    'labels': [{'name': 'enhancement'}, {'name': 'backend'}],
+    'head': {'ref': 'feature/branch', 'sha': '0' * 40},
+    'base': {'ref': 'main', 'sha': '1' * 40},
+}
+
+
+def previous_path(pages, comment_summary):
+    repo_data = []
+    for page in pages:
+        for pr in page:
+            first_comment_created_at, comment_count = comment_summary.get(pr['number'], (None, 0))
+            repo_data.append({
+                'PR Number': pr['number'],
+                'PR Title': pr['title'],
+                'PR State': pr['state'],
+                'Created At': pr['created_at'],
+                'Updated At': pr['updated_at'],
+                'Merged At': pr['merged_at'],
+                'First Comment At': first_comment_created_at,
+                'total Comments in Pr': comment_count,
+            })
+    repo_df = pd.DataFrame(repo_data)
+    repo_df['PR Opened Date'] = pd.to_datetime(repo_df['Created At'], utc=True).dt.tz_convert(None)
+    repo_df['PR Merged Date'] = pd.to_datetime(repo_df['Merged At'], utc=True).dt.tz_convert(None)
+    repo_df['First Comment At'] = pd.to_datetime(repo_df['First Comment At'], utc=True).dt.tz_convert(None)
+    repo_df['PR Duration'] = (repo_df['PR Merged Date'] - repo_df['PR Opened Date']).dt.total_seconds() / 3600
+    repo_df['PR Comments Resolved Duration'] = (repo_df['PR Merged Date'] - repo_df['First Comment At']).dt.total_seconds() / 3600
+    return repo_df
+
+
+def normalized_path(pages, comment_summary):
+    return add_pr_durations(normalize_pulls(pages, comment_summary))
+
+
+# time and memory come from separate runs, since tracing slows the code down
+def measure(func, *args):
+    gc.collect()
+    start = time.perf_counter()
+    df = func(*args)
+    elapsed = time.perf_counter() - start
+    frame_bytes = df.memory_usage(deep=True).sum()
+    del df
+
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, frame_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'prs':>8} {'path':<11} {'seconds':>8} {'peak MB':>8} {'frame MB':>9}")
+    for size in args.sizes:
+        repo = make_repo(size)
+        prs = [dict(PADDING, **pr) for pr in repo['prs']]
+        pages = [prs[i:i + 100] for i in range(0, len(prs), 100)]
+        comment_summary = summarize_comments(c for comments in repo['comments'].values() for c in comments)
+        del repo, prs
+
+        for name, func in [('previous', previous_path), ('normalized', normalized_path)]:
+            elapsed, peak, frame_bytes = measure(func, pages, comment_summary)
+            print(f"{size:>8} {name:<11} {elapsed:>8.3f} {peak / 2**20:>8.1f} {frame_bytes / 2**20:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
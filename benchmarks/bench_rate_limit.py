@@ -0,0 +1,55 @@
+import argparse
+import time
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient
+from dashboard.rate_limit import DEFAULT_HOURLY_BUDGET
+
+
+# Per-PR comment crawl against a mock server with a small emulated hourly
+# budget and injected 502s. With pacing the client stays inside the budget;
+# without it the crawl runs into 403s. The last run is the client as the app builds
+# it, against GitHub's own 5000/hour limit: it should not be paced at all.
+#
+#   python -m benchmarks.bench_rate_limit --prs 300 --budget 200 --window 10
+
+
+def crawl(client):
+    prs = client.fetch_pull_requests('owner', 'repo')
+    client.fetch_comments_for_prs('owner', 'repo', [pr['number'] for pr in prs])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prs', type=int, default=300)
+    parser.add_argument('--budget', type=int, default=200, help="requests allowed per window")
+    parser.add_argument('--window', type=float, default=10, help="rate-limit window in seconds")
+    parser.add_argument('--error-every', type=int, default=50)
+    args = parser.parse_args()
+
+    # scale the emulated window up to an hour so the client's hourly budget matches it
+    hourly_budget = args.budget * 3600 / args.window
+    print(f"{'client':<10} {'requests':>9} {'retries':>8} {'403s':>6} {'throttled':>10} {'seconds':>8}  result")
+    runs = [
+        ('paced', hourly_budget, args.budget, args.window),
+        ('unpaced', None, args.budget, args.window),
+        ('default', DEFAULT_HOURLY_BUDGET, DEFAULT_HOURLY_BUDGET, 3600),
+    ]
+    for name, budget, limit, window in runs:
+        repo = make_repo(args.prs)
+        with MockGitHub(repo, rate_limit=limit, rate_limit_window=window, error_every=args.error_every) as server:
+            client = GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=budget, max_retries=3)
+            start = time.perf_counter()
+            try:
+                crawl(client)
+                result = 'ok'
+            except Exception as e:
+                result = type(e).__name__
+            elapsed = time.perf_counter() - start
+            stats = client.stats
+            print(f"{name:<10} {stats['requests']:>9} {stats['retries']:>8} {server.rate_limited_count:>6} "
+                  f"{stats['throttled_seconds']:>9.1f}s {elapsed:>8.1f}  {result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import functools
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from benchmarks.mock_sheets import MockSheetsHTTPClient, make_sheet
+from dashboard.cache import FrameCache
+from dashboard.github_client import GitHubClient
+from dashboard.instrument import registry
+from dashboard.metrics import sprint_metrics
+from dashboard.normalize import add_pr_durations
+from dashboard.service import FrameService
+from dashboard.sheets import fetch_worksheets
+from dashboard.store import RepoStore
+from dashboard.sync import BackgroundSync, repo_key, sync_repo
+from dashboard.warmup import warm_worksheet
+
+
+# Rerun latency of concurrent dashboard sessions while repos keep changing upstream:
+# in-process, where every session syncs, builds frames and computes metrics in its own
+# script thread as app.py does by default, vs FrameService, where a worker pool does
+# that work once per key. Each session reruns --reruns times, --think seconds apart,
+# over the repos and the sheet; latencies are per rerun.
+#
+#   python -m benchmarks.bench_serving --sessions 1 5 10 25 50
+
+
+def bench_context(base_url, store_path, num_rows):
+    return {
+        'client': GitHubClient('org', 'token', base_url=base_url, hourly_budget=None),
+        'store': RepoStore(store_path),
+        'sheets': lambda: MockSheetsHTTPClient({'Sprint 1': make_sheet(num_rows)}),
+    }
+
+
+# what a rerun of app.py does for one repo and one worksheet without the service
+class InProcess:
+    def __init__(self, client, store, http_client, max_age):
+        self.client = client
+        self.store = store
+        self.http_client = http_client
+        self.background = BackgroundSync(client, store, max_age)
+        self.frames = FrameCache('bench_frames')
+        self.tables = FrameCache('bench_tables')
+
+    def rerun(self, repo, worksheet, revision):
+        state = self.store.sync_state(repo_key(*repo))
+        if state is None:
+            sync_repo(self.client, self.store, *repo)
+            state = self.store.sync_state(repo_key(*repo))
+        else:
+            self.background.request(*repo)
+        frame = self.frames.get_or_load(
+            repo + (state['synced_at'],), lambda: self.store.repo_frame(repo_key(*repo)), group=repo
+        )
+
+        def load():
+            warm_worksheet(self.http_client, self.store, 'bench', worksheet, revision)
+            return self.store.sheet_table('bench', worksheet['title'])
+
+        table = self.tables.get_or_load(('bench', worksheet['title'], revision), load, group=('bench', worksheet['title']))
+        sprint_metrics(table)
+        add_pr_durations(frame)
+
+
+class Served:
+    def __init__(self, service):
+        self.service = service
+
+    def rerun(self, repo, worksheet, revision):
+        [(_, frame)] = self.service.load_repos([repo])
+        self.service.sprint_metrics('bench', worksheet, revision)
+        add_pr_durations(frame)
+
+
+# frames, tables and metrics loaded so far: cache misses in-process, pool jobs with the service
+def _loads(mode_name):
+    counter = 'service_jobs_total' if mode_name == 'service' else 'cache_misses_total'
+    return sum(value for name, _, value in registry.counters() if name == counter)
+
+
+# `sessions` threads rerunning side by side; the latency of every rerun, in seconds
+def run_sessions(mode, sessions, repos, worksheet, args):
+    latencies = []
+    lock = threading.Lock()
+
+    def session(seed):
+        rng = random.Random(seed)
+        time.sleep(rng.uniform(0, args.think))
+        for _ in range(args.reruns):
+            revision = f"r{int(time.monotonic() // args.sheet_period)}"
+            start = time.perf_counter()
+            mode.rerun(rng.choice(repos), worksheet, revision)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            time.sleep(args.think)
+
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+# edit a random PR of a random repo every `interval` seconds until stopped
+def churn(server, names, num_prs, interval, stop):
+    rng = random.Random(0)
+    while not stop.wait(interval):
+        server.touch(rng.randint(1, num_prs), rng.choice(names))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 25, 50])
+    parser.add_argument('--repos', type=int, default=4)
+    parser.add_argument('--prs', type=int, default=5000, help="PRs per repo")
+    parser.add_argument('--rows', type=int, default=5000, help="rows of the sheet")
+    parser.add_argument('--reruns', type=int, default=10, help="reruns per session")
+    parser.add_argument('--think', type=float, default=0.5, help="seconds between a session's reruns")
+    parser.add_argument('--latency', type=float, default=0.01, help="seconds added to every GitHub response")
+    parser.add_argument('--max-age', type=float, default=2.0, help="seconds before a repo is synced again")
+    parser.add_argument('--churn', type=float, default=0.2, help="seconds between upstream PR edits")
+    parser.add_argument('--sheet-period', type=float, default=3.0, help="seconds between sheet revisions")
+    parser.add_argument('--processes', type=int, default=4, help="FrameService worker processes")
+    parser.add_argument('--modes', nargs='+', default=['in-process', 'service'])
+    args = parser.parse_args()
+
+    names = [f"org/repo{i}" for i in range(args.repos)]
+    repos = [tuple(name.split('/')) for name in names]
+    max_age = timedelta(seconds=args.max_age)
+
+    print(f"{'mode':<11} {'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'loads':>7}")
+    with MockGitHub(repos={name: make_repo(args.prs) for name in names}, latency=args.latency) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        for mode_name in args.modes:
+            store_path = os.path.join(directory, f"{mode_name}.sqlite3")
+            store = RepoStore(store_path)
+            if mode_name == 'service':
+                # by its module name: workers don't import __main__ (see dashboard.service)
+                from benchmarks.bench_serving import bench_context as make_context
+                context = functools.partial(make_context, server.base_url, store_path, args.rows)
+                service = FrameService(context, store, args.processes, max_age=max_age)
+                mode = Served(service)
+            else:
+                service = None
+                context = bench_context(server.base_url, store_path, args.rows)
+                mode = InProcess(context['client'], store, context['sheets'](), max_age)
+            worksheet = fetch_worksheets(MockSheetsHTTPClient({'Sprint 1': make_sheet(args.rows)}), 'bench')[0]
+
+            # first crawl of every repo and first sheet load, not measured
+            for repo in repos:
+                mode.rerun(repo, worksheet, 'r-prime')
+
+            stop = threading.Event()
+            churner = threading.Thread(target=churn, args=(server, names, args.prs, args.churn, stop), daemon=True)
+            churner.start()
+            try:
+                for sessions in args.sessions:
+                    before = _loads(mode_name)
+                    latencies = sorted(run_sessions(mode, sessions, repos, worksheet, args))
+                    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                    print(f"{mode_name:<11} {sessions:>8} {len(latencies):>7} {statistics.median(latencies) * 1000:>8.1f} "
+                          f"{p95 * 1000:>8.1f} {latencies[-1] * 1000:>8.1f} {_loads(mode_name) - before:>7}")
+            finally:
+                stop.set()
+                churner.join()
+                if service is not None:
+                    service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import logging
+import statistics
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+import streamlit as st
+
+from dashboard.sheets import authorize
+
+
+# Google auth cost per Streamlit rerun: building credentials and the gspread
+# client at module top level (what every rerun used to pay) vs the
+# process-wide cached resource, which is built once and then only looked up.
+# A GitHub-only page never builds it at all.
+#
+#   python -m benchmarks.bench_startup --reruns 50
+
+
+def service_account_info():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    return {
+        'type': 'service_account',
+        'project_id': 'bench',
+        'private_key_id': 'bench',
+        'private_key': pem.decode(),
+        'client_email': 'bench@bench.iam.gserviceaccount.com',
+        'client_id': '1',
+        'auth_uri': 'https://accounts.google.com/o/oauth2/auth',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+        'auth_provider_x509_cert_url': 'https://www.googleapis.com/oauth2/v1/certs',
+        'client_x509_cert_url': 'https://www.googleapis.com/robot/v1/metadata/x509/bench',
+        'universe_domain': 'googleapis.com',
+    }
+
+
+def timings(func, reruns):
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reruns', type=int, default=50)
+    args = parser.parse_args()
+    # st.cache_resource warns about the missing script run context outside `streamlit run`
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    info = service_account_info()
+
+    @st.cache_resource
+    def get_sheets_client():
+        return authorize(info)
+
+    per_rerun = timings(lambda: authorize(info), args.reruns)
+    cold = timings(get_sheets_client, 1)
+    cached = timings(get_sheets_client, args.reruns)
+
+    print(f"{'path':<34} {'first ms':>9} {'median ms':>10}")
+    print(f"{'top-level auth on every rerun':<34} {per_rerun[0]:>9.3f} {statistics.median(per_rerun):>10.3f}")
+    print(f"{'cached resource':<34} {cold[0]:>9.3f} {statistics.median(cached):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
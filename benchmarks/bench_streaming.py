@@ -0,0 +1,60 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient, summarize_comments
+from dashboard.normalize import normalize_pulls
+from dashboard.store import RepoStore
+from dashboard.sync import iter_sync_repo
+
+
+# Time to the first drawable page and peak Python memory of a cold crawl that
+# holds every raw page until the end, vs the streaming crawl that stores and
+# drops each page as it arrives.
+#
+#   python -m benchmarks.bench_streaming --prs 5000 --latency 0.05
+
+
+def crawl_all(client, store):
+    pulls = client.fetch_pull_requests('owner', 'repo')
+    comments = client.fetch_repo_comments('owner', 'repo')
+    return normalize_pulls([pulls], summarize_comments(comments)), time.perf_counter()
+
+
+def crawl_streaming(client, store):
+    first = None
+    for event in iter_sync_repo(client, store, 'owner', 'repo'):
+        if first is None and event['stage'] == 'pulls':
+            normalize_pulls([event['pulls']])
+            first = time.perf_counter()
+    return store.repo_frame('owner/repo'), first
+
+
+def measure(label, crawl, client, store):
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame, first = crawl(client, store)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} {first - start:>12.2f} {elapsed:>9.2f} {peak / 2 ** 20:>10.1f} {len(frame):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prs', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds added to every response")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, MockGitHub(make_repo(args.prs), latency=args.latency) as server:
+        client = GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=None)
+        print(f"{'crawl':<12} {'first page s':>12} {'total s':>9} {'peak MiB':>10} {'PRs':>7}")
+        measure('hold all', crawl_all, client, RepoStore(os.path.join(directory, 'all.sqlite3')))
+        measure('streaming', crawl_streaming, client, RepoStore(os.path.join(directory, 'streaming.sqlite3')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient
+from dashboard.store import RepoStore
+from dashboard.sync import repo_key, sync_repo
+
+
+# Cold sync, warm restart from the local store, and delta syncs with and
+# without upstream changes, against the local mock server.
+#
+#   python -m benchmarks.bench_sync --prs 2000 --latency 0.02
+
+
+def timed(label, func, client):
+    requests_before = client.request_count
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {client.request_count - requests_before:>9} {elapsed:>8.3f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prs', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every response")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, MockGitHub(make_repo(args.prs), latency=args.latency) as server:
+        store = RepoStore(os.path.join(directory, 'github.sqlite3'))
+        client = GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=None)
+        sync = lambda: sync_repo(client, store, 'owner', 'repo')
+
+        print(f"{'step':<28} {'requests':>9} {'seconds':>8}")
+        timed('cold sync', sync, client)
+        # a restarted process only needs the store to render
+        timed('warm restart (store read)', lambda: RepoStore(store.path).repo_frame(repo_key('owner', 'repo')), client)
+        timed('first delta sync', sync, client)
+        timed('delta sync, no changes', sync, client)
+        server.touch(1)
+        timed('delta sync, 1 PR changed', sync, client)
+        print(f"PR 1 comments after delta: {store.repo_frame(repo_key('owner', 'repo')).set_index('PR Number').loc[1, 'total Comments in Pr']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.mock_github import make_repo
+from benchmarks.mock_sheets import make_sheet
+from dashboard.metrics import compute_sprint_metrics
+from dashboard.normalize import add_pr_durations, normalize_pulls
+from dashboard.tickets import TICKET_PATTERN, link_tasks_to_prs, pr_ticket_index, task_pr_summary
+
+
+# Linking sheet tasks to PRs by ticket ID: a nested loop over tasks and PRs vs the
+# inverted index, built cold and reused. The nested loop only runs up to
+# --nested-limit comparisons, beyond that it is extrapolated from a sample.
+#
+#   python -m benchmarks.bench_tickets --tasks 1000 10000 --prs 10000 100000
+
+
+def nested_loop(tasks, repo_df, limit=None):
+    texts = [f"{title} {branch}".upper() for title, branch in zip(repo_df['PR Title'], repo_df['PR Branch'])]
+    pairs = []
+    for task_row, name in enumerate(tasks['TASK_NAME'].tolist()[:limit]):
+        for ticket in TICKET_PATTERN.findall(name.upper()):
+            # a substring test, as a hand-written matcher would do (TASK-1 also hits TASK-10)
+            pairs += [(task_row, pr_row) for pr_row, text in enumerate(texts) if ticket in text]
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--prs', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--nested-limit', type=int, default=20, help="tasks timed with the nested loop per size")
+    args = parser.parse_args()
+
+    print(f"{'tasks':>6} {'prs':>7} {'nested s (est.)':>16} {'index s':>8} {'link s':>7} {'cold s':>7} {'linked':>7}")
+    for num_prs in args.prs:
+        repo_df = add_pr_durations(normalize_pulls([make_repo(num_prs, comments_per_pr=0)['prs']]))
+        for num_tasks in args.tasks:
+            sheet = make_sheet(num_tasks)
+            tasks = compute_sprint_metrics(pd.DataFrame(sheet[1:], columns=sheet[0]))['tasks']
+
+            start = time.perf_counter()
+            nested_loop(tasks, repo_df, args.nested_limit)
+            nested = (time.perf_counter() - start) / min(args.nested_limit, num_tasks) * num_tasks
+
+            start = time.perf_counter()
+            index = pr_ticket_index(repo_df)
+            built = time.perf_counter() - start
+            start = time.perf_counter()
+            linked = task_pr_summary(link_tasks_to_prs(tasks, repo_df, index))
+            link = time.perf_counter() - start
+            print(f"{num_tasks:>6} {num_prs:>7} {nested:>16.1f} {built:>8.3f} {link:>7.3f} {built + link:>7.3f} {len(linked):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+# a local stand-in for the parts of the GitHub REST API the dashboard uses
+
+# PRs are an hour apart, so 100k of them span ~11 years; starting in 2010 keeps
+# every generated timestamp in the past, where delta syncs expect it
+EPOCH = datetime(2010, 1, 1, tzinfo=timezone.utc)
+
+
+def _timestamp(hours):
+    return (EPOCH + timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# num_prs PRs, three in four merged, with 0..comments_per_pr comments each;
+# 100k PRs take about a second to generate
+def make_repo(num_prs, comments_per_pr=3):
+    prs = []
+    comments = {}
+    # formatting the timestamps once is most of the generation time saved
+    stamps = [_timestamp(hours) for hours in range(num_prs + max(31, comments_per_pr + 2))]
+    for number in range(1, num_prs + 1):
+        merged = number % 4 != 0
+        prs.append({
+            'number': number,
+            'title': f"PR {number}: synthetic change",
+            'state': 'closed' if merged else 'open',
+            'created_at': stamps[number],
+            'updated_at': stamps[number + 30],
+            'merged_at': stamps[number + 24] if merged else None,
+            # ticket IDs as in the sheet stand-in's task names
+            'head': {'ref': f"feature/TASK-{number}-synthetic-change"},
+        })
+        comments[number] = [
+            {
+                'id': number * 1000 + i,
+                'issue_url': f"https://api.github.com/repos/owner/repo/issues/{number}",
+                'created_at': stamps[number + i + 1],
+                'updated_at': stamps[number + i + 1],
+                'body': 'looks good',
+            }
+            for i in range(number % (comments_per_pr + 1))
+        ]
+    return {'prs': prs, 'comments': comments}
+
+
+def _sorted(items, query, direction):
+    key = 'updated_at' if query.get('sort') == 'updated' else 'created_at'
+    reverse = query.get('direction', direction) == 'desc'
+    return sorted(items, key=lambda item: (item[key], item.get('number', item.get('id'))), reverse=reverse)
+
+
+class MockGitHub:
+    # rate_limit emulates GitHub's hourly budget over a rate_limit_window-second
+    # window; error_every=n answers every n-th request with a 502
+    #
+    # `repo` answers for every owner/name; `repos` maps "owner/name" to a repo
+    # of its own, and `repo_latency` adds per-repo latency on top of `latency`
+    def __init__(self, repo=None, latency=0.0, rate_limit=None, rate_limit_window=3600, error_every=0,
+                 repos=None, repo_latency=None):
+        self.repo = repo
+        self.repos = repos or {}
+        self.repo_latency = repo_latency or {}
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.error_every = error_every
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self._window_start = time.time()
+        self._window_used = 0
+        self._lock = threading.Lock()
+        # sorted listings per repo and query, so paging through a 100k-PR repo
+        # doesn't re-sort it for every page; touch() drops them
+        self._listings = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if mock._admit(self):
+                    mock.handle_get(self)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if mock._admit(self):
+                    mock.handle_graphql(self, body)
+
+        return Handler
+
+    # count the request and answer it with an error if the emulated limits say so
+    def _admit(self, handler):
+        with self._lock:
+            self.request_count += 1
+            count = self.request_count
+            if time.time() - self._window_start >= self.rate_limit_window:
+                self._window_start, self._window_used = time.time(), 0
+            exhausted = self.rate_limit is not None and self._window_used >= self.rate_limit
+            if exhausted:
+                self.rate_limited_count += 1
+            else:
+                self._window_used += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if exhausted:
+            self._send_json(handler, 403, {'message': 'API rate limit exceeded'})
+            return False
+        if self.error_every and count % self.error_every == 0:
+            self._send_json(handler, 502, {'message': 'Server Error'})
+            return False
+        return True
+
+    def _rate_limit_headers(self):
+        if self.rate_limit is None:
+            return {}
+        with self._lock:
+            remaining = max(0, self.rate_limit - self._window_used)
+            reset = self._window_start + self.rate_limit_window
+        return {
+            'X-RateLimit-Limit': str(self.rate_limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(int(reset) + 1),
+        }
+
+    def _lookup(self, owner, name):
+        key = f"{owner}/{name}"
+        time.sleep(self.repo_latency.get(key, 0))
+        return self.repos.get(key, self.repo)
+
+    def handle_get(self, handler):
+        parts = urlparse(handler.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+        if re.fullmatch(r'/(orgs|users)/[^/]+/repos', parts.path):
+            owner = parts.path.split('/')[2]
+            items = [{'name': key.split('/', 1)[1], 'archived': False} for key in self.repos if key.startswith(owner + '/')]
+            return self._send_page(handler, parts.path, query, items)
+
+        match = re.match(r'/repos/([^/]+)/([^/]+)/', parts.path)
+        repo = self._lookup(*match.groups()) if match else None
+        if repo is None:
+            return self._send_json(handler, 404, {'message': 'Not Found'})
+
+        if re.fullmatch(r'/repos/[^/]+/[^/]+/pulls', parts.path):
+            items = self._listing(repo, 'pulls', query, lambda: _sorted(repo['prs'], query, direction='desc'))
+            return self._send_page(handler, parts.path, query, items)
+
+        if re.fullmatch(r'/repos/[^/]+/[^/]+/issues/comments', parts.path):
+            def comments():
+                items = [c for comments in repo['comments'].values() for c in comments]
+                if 'since' in query:
+                    items = [c for c in items if c['updated_at'] >= query['since']]
+                return _sorted(items, query, direction='asc')
+            return self._send_page(handler, parts.path, query, self._listing(repo, 'comments', query, comments))
+
+        match = re.fullmatch(r'/repos/[^/]+/[^/]+/issues/(\d+)/comments', parts.path)
+        if match:
+            items = repo['comments'].get(int(match.group(1)), [])
+            return self._send_page(handler, parts.path, query, items)
+
+        self._send_json(handler, 404, {'message': 'Not Found'})
+
+    # answers the pullRequests query in dashboard/graphql_loader.py
+    def handle_graphql(self, handler, body):
+        if urlparse(handler.path).path != '/graphql':
+            return self._send_json(handler, 404, {'message': 'Not Found'})
+
+        variables = body['variables']
+        repo = self._lookup(variables['owner'], variables['name'])
+        if repo is None:
+            return self._send_json(handler, 200, {'errors': [{'message': 'Could not resolve to a Repository'}]})
+
+        start = int(variables['cursor']) if variables.get('cursor') else 0
+        prs = self._listing(repo, 'graphql', {}, lambda: sorted(repo['prs'], key=lambda pr: pr['created_at'], reverse=True))
+        nodes = []
+        for pr in prs[start:start + 100]:
+            comments = sorted(repo['comments'].get(pr['number'], []), key=lambda c: c['created_at'])
+            if pr['merged_at']:
+                state = 'MERGED'
+            else:
+                state = 'OPEN' if pr['state'] == 'open' else 'CLOSED'
+            nodes.append({
+                'number': pr['number'],
+                'title': pr['title'],
+                'headRefName': pr['head']['ref'],
+                'state': state,
+                'createdAt': pr['created_at'],
+                'updatedAt': pr['updated_at'],
+                'mergedAt': pr['merged_at'],
+                'comments': {
+                    'totalCount': len(comments),
+                    'nodes': [{'createdAt': c['created_at']} for c in comments[:1]],
+                },
+            })
+        end = start + len(nodes)
+        page_info = {'hasNextPage': end < len(prs), 'endCursor': str(end)}
+        self._send_json(handler, 200, {'data': {'repository': {'pullRequests': {'pageInfo': page_info, 'nodes': nodes}}}})
+
+    def _listing(self, repo, kind, query, build):
+        key = (id(repo), kind, query.get('sort'), query.get('direction'), query.get('since'))
+        with self._lock:
+            listing = self._listings.get(key)
+        if listing is None:
+            listing = build()
+            with self._lock:
+                self._listings[key] = listing
+        return listing
+
+    # add or change a PR and a comment on it, as a user would between syncs; `name`
+    # ("owner/name") picks one of `repos`
+    def touch(self, number, name=None):
+        repo = self.repos.get(name, self.repo)
+        with self._lock:
+            self._listings.clear()
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        pr = next(pr for pr in repo['prs'] if pr['number'] == number)
+        pr['updated_at'] = now
+        comments = repo['comments'].setdefault(number, [])
+        comments.append({
+            'id': number * 1000 + len(comments) + 500,
+            'issue_url': f"https://api.github.com/repos/owner/repo/issues/{number}",
+            'created_at': now,
+            'updated_at': now,
+            'body': 'one more thing',
+        })
+
+    def _send_page(self, handler, path, query, items):
+        per_page = int(query.get('per_page', 30))
+        page = int(query.get('page', 1))
+        last_page = max(1, -(-len(items) // per_page))
+        body = items[(page - 1) * per_page:page * per_page]
+
+        links = []
+        if page < last_page:
+            links.append(f'<{self._url(path, query, page + 1)}>; rel="next"')
+            links.append(f'<{self._url(path, query, last_page)}>; rel="last"')
+        headers = {'Link': ', '.join(links)} if links else {}
+
+        etag = '"%s"' % hashlib.md5(json.dumps(body).encode()).hexdigest()
+        headers['ETag'] = etag
+        if handler.headers.get('If-None-Match') == etag:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            for name, value in self._rate_limit_headers().items():
+                handler.send_header(name, value)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        self._send_json(handler, 200, body, headers)
+
+    def _url(self, path, query, page):
+        return f"{self.base_url}{path}?{urlencode(dict(query, page=page))}"
+
+    def _send_json(self, handler, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        for name, value in dict(self._rate_limit_headers(), **(headers or {})).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
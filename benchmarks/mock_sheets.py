@@ -0,0 +1,108 @@
+import random
+import re
+import threading
+import time
+
+from gspread.utils import a1_to_rowcol
+
+
+# an in-process stand-in for the gspread HTTP client calls the dashboard makes
+
+HEADER = ['TASK_NAME', 'ASSIGNEE', 'ESTIMATE', 'ACTUAL', 'RISKS', 'REQUIREMENT', 'TECHNICAL', 'AD_HOC']
+ASSIGNEES = ['asha', 'ben', 'chen', 'dana', 'eli']
+RISKS = ['Risk', 'No risks', 'Not yet identified']
+
+
+def make_sheet(num_rows, seed=0):
+    rng = random.Random(seed)
+    rows = [HEADER]
+    for i in range(num_rows):
+        estimate = rng.randint(1, 16)
+        actual = '' if i % 7 == 0 else str(max(1, estimate + rng.randint(-3, 5)))
+        rows.append([
+            f"TASK-{i + 1} implement part {i + 1} of the sprint goal",
+            rng.choice(ASSIGNEES),
+            str(estimate),
+            actual,
+            rng.choice(RISKS),
+            'clear',
+            'not yet identified' if i % 11 == 0 else 'clear',
+            'no',
+        ])
+    return rows
+
+
+def _column_index(letters):
+    return a1_to_rowcol(f"{letters}1")[1] - 1
+
+
+class MockSheetsHTTPClient:
+    # `sheets` maps worksheet title to its rows, header row first
+    def __init__(self, sheets, latency=0.0, modified_time='2024-01-01T00:00:00.000Z'):
+        self.sheets = sheets
+        self.latency = latency
+        self.modified_time = modified_time
+        self.request_count = 0
+        self.cells_returned = 0
+        self._lock = threading.Lock()
+        self._columns = {}
+
+    def _request(self, cells=0):
+        with self._lock:
+            self.request_count += 1
+            self.cells_returned += cells
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fetch_sheet_metadata(self, id, params=None):
+        self._request()
+        return {'sheets': [
+            {'properties': {'sheetId': i, 'title': title, 'gridProperties': {'rowCount': max(len(rows), 1000), 'columnCount': len(HEADER)}}}
+            for i, (title, rows) in enumerate(self.sheets.items())
+        ]}
+
+    def get_file_drive_metadata(self, id):
+        self._request()
+        return {'id': id, 'modifiedTime': self.modified_time}
+
+    def _read(self, range_name, major_dimension='ROWS'):
+        title, cells = range_name.rsplit('!', 1)
+        rows = self.sheets[title.strip("'").replace("''", "'")]
+        match = re.fullmatch(r'([A-Z]*)(\d*):([A-Z]*)(\d*)', cells)
+        first_col, first_row, last_col, last_row = match.groups()
+        first_row = int(first_row or 1) - 1
+        last_row = int(last_row or len(rows))
+        first_col = _column_index(first_col) if first_col else 0
+        last_col = _column_index(last_col) + 1 if last_col else len(HEADER)
+
+        if major_dimension == 'COLUMNS':
+            values = [self._column(title, rows, index)[first_row:last_row] for index in range(first_col, last_col)]
+            # like the API, drop each column's trailing empty cells
+            values = [column[:next((i + 1 for i in range(len(column) - 1, -1, -1) if column[i] != ''), 0)] for column in values]
+        else:
+            values = [row[first_col:last_col] for row in rows[first_row:last_row]]
+        return {'range': range_name, 'majorDimension': major_dimension, 'values': values}
+
+    # one column of a worksheet, transposed once and kept, so big sheets don't
+    # make the stand-in itself the slow part of a benchmark
+    def _column(self, title, rows, index):
+        key = (title, index)
+        if key not in self._columns:
+            self._columns[key] = [row[index] for row in rows]
+        return self._columns[key]
+
+    def values_get(self, id, range, params=None):
+        value_range = self._read(range, (params or {}).get('majorDimension', 'ROWS'))
+        self._request(sum(len(v) for v in value_range['values']))
+        return value_range
+
+    def values_batch_get(self, id, ranges, params=None):
+        value_ranges = [self._read(range_name, (params or {}).get('majorDimension', 'ROWS')) for range_name in ranges]
+        self._request(sum(len(v) for value_range in value_ranges for v in value_range['values']))
+        return {'spreadsheetId': id, 'valueRanges': value_ranges}
+
+    # what Worksheet.get_all_values() costs: every cell of the sheet in one request
+    def get_all_values(self, title):
+        rows = self.sheets[title]
+        self._request(sum(len(row) for row in rows))
+        return [list(row) for row in rows]
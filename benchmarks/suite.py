@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import plotly
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from benchmarks.mock_sheets import MockSheetsHTTPClient, make_sheet
+from dashboard import metrics
+from dashboard.charts import (
+    dev_time_figure,
+    dev_velocity_figure,
+    figure_payload_bytes,
+    pr_comment_count_figure,
+    pr_duration_figure,
+    pr_resolution_figure,
+    repo_facet,
+    risk_figure,
+    task_distribution_figure,
+    velocity_figure,
+)
+from dashboard.github_client import GitHubClient
+from dashboard.normalize import add_pr_durations
+from dashboard.rate_limit import DEFAULT_HOURLY_BUDGET
+from dashboard.sheets import fetch_worksheets
+from dashboard.store import RepoStore
+from dashboard.sync import is_stale, repo_key, sync_repo
+from dashboard.trend import load_sprint_trend
+from dashboard.warmup import warm_worksheet
+
+
+# Reproducible load scenarios against the local GitHub and Sheets stand-ins, with
+# the results written as JSON for regression tracking:
+#
+#   github_cold   first crawl of a repo into an empty store, read back as the PR frame
+#   github_paced  the cold crawl with the client's default pacing, against GitHub's 5000/hour limit
+#   github_warm   a rerun once the repo is in the store: freshness check and frame read
+#   github_delta  a delta sync with nothing changed upstream (conditional requests only)
+#   sheet_full    the whole worksheet via get_all_values, as the app first did
+#   sheet_cold    first read of a worksheet's metric columns into the store, plus metrics
+#   sheet_warm    a rerun once the worksheet is in the store at the current revision
+#   trend_cold    the sprint trend of --sprints worksheets into an empty store
+#   trend_edit    the trend again after one sprint was edited (new revision, one sprint recomputed)
+#   visualize     sprint metrics and every chart built and serialized, as one Visualize click
+#
+#   python -m benchmarks.suite --prs 100,1000,10000,100000 --rows 10,1000,50000 --output results.json
+#   python -m benchmarks.suite --compare results.json
+
+
+def _sizes(text):
+    return [int(size) for size in text.split(',') if size]
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# run `setup` then `func` `repeat` times; only func is timed
+def measure(func, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        func(state)
+        samples.append(time.perf_counter() - start)
+    return {'seconds': statistics.median(samples), 'samples': [round(sample, 6) for sample in samples]}
+
+
+def github_scenarios(num_prs, args, directory):
+    results = []
+    with MockGitHub(make_repo(num_prs), latency=args.latency) as server:
+        client = GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=None)
+        repo = repo_key('owner', 'repo')
+        paths = iter(range(sys.maxsize))
+
+        def cold(store):
+            sync_repo(client, store, 'owner', 'repo')
+            add_pr_durations(store.repo_frame(repo))
+
+        before = server.request_count
+        result = measure(cold, args.cold_repeat, lambda: RepoStore(os.path.join(directory, f"github-{num_prs}-{next(paths)}.sqlite3")))
+        results.append({'scenario': 'github_cold', 'prs': num_prs, 'requests': (server.request_count - before) // args.cold_repeat, **result})
+
+        # a server of its own per run, so every run starts with the full hourly budget;
+        # they are shut down after the measurement, which takes up to half a second each
+        servers = []
+
+        def paced_setup():
+            servers.append(MockGitHub(server.repo, latency=args.latency, rate_limit=DEFAULT_HOURLY_BUDGET).__enter__())
+            return servers[-1], RepoStore(os.path.join(directory, f"github-{num_prs}-{next(paths)}.sqlite3"))
+
+        def paced(state):
+            limited, store = state
+            sync_repo(GitHubClient('owner', 'token', base_url=limited.base_url), store, 'owner', 'repo')
+
+        result = measure(paced, args.cold_repeat, paced_setup)
+        requests = servers[0].request_count
+        for limited in servers:
+            limited.__exit__(None, None, None)
+        results.append({'scenario': 'github_paced', 'prs': num_prs, 'requests': requests, **result})
+
+        store = RepoStore(os.path.join(directory, f"github-{num_prs}-{next(paths)}.sqlite3"))
+        sync_repo(client, store, 'owner', 'repo')
+
+        def warm(_):
+            is_stale(store.sync_state(repo))
+            add_pr_durations(store.repo_frame(repo))
+
+        results.append({'scenario': 'github_warm', 'prs': num_prs, 'requests': 0, **measure(warm, args.repeat)})
+
+        before = server.request_count
+        result = measure(lambda _: sync_repo(client, store, 'owner', 'repo'), args.repeat)
+        results.append({'scenario': 'github_delta', 'prs': num_prs, 'requests': (server.request_count - before) // args.repeat, **result})
+        return results, add_pr_durations(store.repo_frame(repo)).assign(Repo='repo')
+
+
+def sheet_scenarios(num_rows, args, directory):
+    results = []
+    http_client = MockSheetsHTTPClient({'Sprint 1': make_sheet(num_rows)}, latency=args.sheet_latency)
+    worksheet = fetch_worksheets(http_client, 'bench')[0]
+    paths = iter(range(sys.maxsize))
+
+    def full(_):
+        rows = http_client.get_all_values('Sprint 1')
+        metrics.compute_sprint_metrics(pd.DataFrame(rows[1:], columns=rows[0]))
+
+    results.append({'scenario': 'sheet_full', 'rows': num_rows, **measure(full, args.repeat)})
+
+    def cold(store):
+        warm_worksheet(http_client, store, 'bench', worksheet, http_client.modified_time)
+        metrics.compute_sprint_metrics(store.sheet_table('bench', 'Sprint 1'))
+
+    before = http_client.cells_returned
+    result = measure(cold, args.cold_repeat, lambda: RepoStore(os.path.join(directory, f"sheet-{num_rows}-{next(paths)}.sqlite3")))
+    results.append({'scenario': 'sheet_cold', 'rows': num_rows, 'cells': (http_client.cells_returned - before) // args.cold_repeat, **result})
+
+    store = RepoStore(os.path.join(directory, f"sheet-{num_rows}-{next(paths)}.sqlite3"))
+    warm_worksheet(http_client, store, 'bench', worksheet, http_client.modified_time)
+
+    def warm(_):
+        warm_worksheet(http_client, store, 'bench', worksheet, http_client.modified_time)
+        metrics.sprint_metrics(store.sheet_table('bench', 'Sprint 1'))
+
+    results.append({'scenario': 'sheet_warm', 'rows': num_rows, **measure(warm, args.repeat)})
+    return results, store.sheet_table('bench', 'Sprint 1')
+
+
+def trend_scenarios(num_rows, args, directory):
+    sheets = {f"Sprint {i + 1}": make_sheet(num_rows, seed=i) for i in range(args.sprints)}
+    http_client = MockSheetsHTTPClient(sheets, latency=args.sheet_latency)
+    worksheets = fetch_worksheets(http_client, 'bench')
+    paths = iter(range(sys.maxsize))
+
+    def cold(store):
+        load_sprint_trend(http_client, store, 'bench', worksheets, 'r0')
+
+    before = http_client.request_count
+    result = measure(cold, args.cold_repeat, lambda: RepoStore(os.path.join(directory, f"trend-{num_rows}-{next(paths)}.sqlite3")))
+    results = [{'scenario': 'trend_cold', 'rows': num_rows, 'sprints': args.sprints,
+                'requests': (http_client.request_count - before) // args.cold_repeat, **result}]
+
+    store = RepoStore(os.path.join(directory, f"trend-{num_rows}-{next(paths)}.sqlite3"))
+    load_sprint_trend(http_client, store, 'bench', worksheets, 'r0')
+    revisions = iter(range(1, sys.maxsize))
+
+    def edit():
+        revision = f"r{next(revisions)}"
+        sheets['Sprint 1'][1][3] = revision[1:]
+        http_client._columns.clear()
+        return revision
+
+    before = http_client.request_count
+    result = measure(lambda revision: load_sprint_trend(http_client, store, 'bench', worksheets, revision), args.repeat, edit)
+    results.append({'scenario': 'trend_edit', 'rows': num_rows, 'sprints': args.sprints,
+                    'requests': (http_client.request_count - before) // args.repeat, **result})
+    return results
+
+
+# everything app.py does between the Visualize click and the last chart
+def visualize(repo_df, table):
+    sprint = metrics.sprint_metrics(table)
+    facet = repo_facet(1)
+    figures = [
+        velocity_figure(sprint['total_estimate'], sprint['total_actual'], sprint['time_status']),
+        dev_velocity_figure(sprint['dev_contributions']),
+        dev_time_figure(sprint['tasks']),
+        risk_figure(sprint['risk_counts']),
+        task_distribution_figure(sprint['tasks']),
+        pr_duration_figure(repo_df),
+        pr_resolution_figure(repo_df, facet),
+        pr_comment_count_figure(repo_df, facet),
+    ]
+    return sum(figure_payload_bytes(fig) for fig in figures)
+
+
+def visualize_scenario(num_prs, repo_df, num_rows, table, args):
+    payload = visualize(repo_df, table)
+    # a fresh memo each time, as on the first click after the sheet changed
+    result = measure(lambda _: visualize(repo_df, table), args.repeat, setup=metrics._memo.clear)
+    return {'scenario': 'visualize', 'prs': num_prs, 'rows': num_rows, 'payload_bytes': payload, **result}
+
+
+def _key(result):
+    return (result['scenario'], result.get('prs'), result.get('rows'))
+
+
+# slowdowns against an earlier results file; True when any is beyond the tolerance
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = {_key(result): result for result in json.load(f)['results']}
+    regressed = False
+    print(f"\n{'scenario':<14} {'prs':>7} {'rows':>7} {'baseline s':>11} {'now s':>9} {'ratio':>7}")
+    for result in results:
+        before = baseline.get(_key(result))
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        flag = ' REGRESSION' if ratio > 1 + tolerance else ''
+        regressed |= bool(flag)
+        print(f"{result['scenario']:<14} {result.get('prs') or '':>7} {result.get('rows') or '':>7} "
+              f"{before['seconds']:>11.4f} {result['seconds']:>9.4f} {ratio:>7.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prs', type=_sizes, default=_sizes('100,1000,10000'), help="comma-separated repo sizes, up to 100000")
+    parser.add_argument('--rows', type=_sizes, default=_sizes('10,1000,50000'), help="comma-separated sheet sizes")
+    parser.add_argument('--sprints', type=int, default=12, help="worksheets in the trend scenarios")
+    parser.add_argument('--trend-rows', type=_sizes, default=_sizes('1000'), help="comma-separated rows per trend worksheet")
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every GitHub response")
+    parser.add_argument('--sheet-latency', type=float, default=0.05, help="seconds added to every Sheets request")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per warm scenario; the median is reported")
+    parser.add_argument('--cold-repeat', type=int, default=3, help="runs per cold scenario, each into an empty store")
+    parser.add_argument('--output', help="write the results here as JSON")
+    parser.add_argument('--compare', help="an earlier --output file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="slowdown ratio above 1 that counts as a regression")
+    args = parser.parse_args()
+
+    results = []
+    repo_frames, tables = {}, {}
+    with tempfile.TemporaryDirectory() as directory:
+        for num_prs in args.prs:
+            scenario_results, repo_frames[num_prs] = github_scenarios(num_prs, args, directory)
+            results += scenario_results
+        for num_rows in args.rows:
+            scenario_results, tables[num_rows] = sheet_scenarios(num_rows, args, directory)
+            results += scenario_results
+        for num_rows in args.trend_rows:
+            results += trend_scenarios(num_rows, args, directory)
+    for num_prs, repo_df in repo_frames.items():
+        for num_rows, table in tables.items():
+            results.append(visualize_scenario(num_prs, repo_df, num_rows, table, args))
+
+    print(f"{'scenario':<14} {'prs':>7} {'rows':>7} {'seconds':>9} {'requests':>9} {'payload KB':>11}")
+    for result in results:
+        payload = f"{result['payload_bytes'] / 1024:.0f}" if 'payload_bytes' in result else ''
+        print(f"{result['scenario']:<14} {result.get('prs') or '':>7} {result.get('rows') or '':>7} "
+              f"{result['seconds']:>9.4f} {result.get('requests', ''):>9} {payload:>11}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'latency': args.latency,
+            'sheet_latency': args.sheet_latency,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
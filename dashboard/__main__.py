@@ -0,0 +1,4 @@
+from dashboard.cli import main
+
+
+main()
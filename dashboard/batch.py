@@ -0,0 +1,126 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from gspread.utils import extract_id_from_url
+
+from dashboard.instrument import registry, timed
+from dashboard.metrics import compute_sprint_metrics, is_sprint_table, pr_metrics, sprint_summary
+from dashboard.normalize import add_pr_durations
+from dashboard.repos import parse_repo_input
+from dashboard.settings import DEFAULT_SECRETS_PATH, github_client, load_secrets, repo_store, sheets_client
+from dashboard.sheets import fetch_revision, fetch_worksheets
+from dashboard.sync import DEFAULT_SYNC_INTERVAL, TIME_FORMAT, repo_key
+from dashboard.warmup import warm_repos, warm_worksheets
+
+
+# the same metrics the dashboard draws, computed without Streamlit, e.g.
+#
+#   python -m dashboard metrics --repos "org:acme" --sheet URL --out metrics/
+
+OUTPUT_FORMATS = ['parquet', 'json']
+
+
+# one PR frame per repo, durations added; repos whose local copy is older than
+# `max_age` are synced first
+def load_repo_frames(client, store, repos, max_age=DEFAULT_SYNC_INTERVAL):
+    warm_repos(client, store, repos, max_age)
+    return {repo: add_pr_durations(store.repo_frame(repo_key(*repo))) for repo in repos}
+
+
+# {worksheet title: sheet frame} for every worksheet of a spreadsheet, read through the store
+def load_sheet_tables(http_client, store, spreadsheet_id, max_age=DEFAULT_SYNC_INTERVAL):
+    worksheets = fetch_worksheets(http_client, spreadsheet_id)
+    warm_worksheets(http_client, store, spreadsheet_id, worksheets, fetch_revision(http_client, spreadsheet_id), max_age)
+    return {worksheet['title']: store.sheet_table(spreadsheet_id, worksheet['title']) for worksheet in worksheets}
+
+
+# map on a process pool when there is more than one process and more than one item;
+# the metric functions are pure, so they spread across cores as is
+def _map(func, items, processes):
+    items = list(items)
+    if processes <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(max_workers=min(processes, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def write_frame(df, directory, name, output_format):
+    path = os.path.join(directory, f"{name}.{output_format}")
+    if output_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_json(path, orient='records', date_format='iso')
+    return path
+
+
+# PR metrics per repo and sprint metrics per sprint worksheet; the frames behind them are
+# written to `out_dir` as prs, tasks and dev_contributions, the numbers as metrics.json
+def run_batch(client, store, repos, spreadsheet_ids=(), http_client=None, out_dir='.', output_format='parquet',
+              processes=1, max_age=DEFAULT_SYNC_INTERVAL):
+    os.makedirs(out_dir, exist_ok=True)
+    summary = {'generated_at': datetime.now(timezone.utc).strftime(TIME_FORMAT), 'repos': {}, 'sprints': []}
+
+    if repos:
+        with timed('load_repo_frames'):
+            frames = load_repo_frames(client, store, repos, max_age)
+        for repo, metrics in zip(frames, _map(pr_metrics, frames.values(), processes)):
+            summary['repos'][repo_key(*repo)] = metrics
+        prs = pd.concat([frame.assign(Repo=repo_key(*repo)) for repo, frame in frames.items()], ignore_index=True)
+        write_frame(prs, out_dir, 'prs', output_format)
+
+    sheets = [
+        (spreadsheet_id, title, table)
+        for spreadsheet_id in spreadsheet_ids
+        for title, table in load_sheet_tables(http_client, store, spreadsheet_id, max_age).items()
+        if is_sprint_table(table)
+    ]
+    if sheets:
+        sprints = _map(compute_sprint_metrics, [table for _, _, table in sheets], processes)
+        tasks, contributions = [], []
+        for (spreadsheet_id, title, _), metrics in zip(sheets, sprints):
+            summary['sprints'].append({'spreadsheet_id': spreadsheet_id, 'worksheet': title, **sprint_summary(metrics)})
+            tasks.append(metrics['tasks'].assign(Spreadsheet=spreadsheet_id, Worksheet=title))
+            contributions.append(metrics['dev_contributions'].assign(Spreadsheet=spreadsheet_id, Worksheet=title))
+        write_frame(pd.concat(tasks, ignore_index=True), out_dir, 'tasks', output_format)
+        write_frame(pd.concat(contributions, ignore_index=True), out_dir, 'dev_contributions', output_format)
+
+    with open(os.path.join(out_dir, 'metrics.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def add_arguments(parser):
+    parser.add_argument('--secrets', default=DEFAULT_SECRETS_PATH, help="Streamlit secrets file with the [google] table")
+    parser.add_argument('--repos', default='', help="repos in the dashboard's input format, e.g. \"api, acme/web, org:acme\"")
+    parser.add_argument('--sheet', action='append', default=[], help="sheet URL, repeatable; every worksheet is included")
+    parser.add_argument('--out', default='dashboard-metrics', help="output directory")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='parquet', help="format of the frame outputs")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="processes computing metrics")
+    parser.add_argument('--metrics-file', help="also write timings and request counts here, in Prometheus text format")
+    parser.add_argument('--max-age', type=float, default=DEFAULT_SYNC_INTERVAL.total_seconds() / 60,
+                        help="minutes the local copy may be old before it is synced")
+
+
+def run(args):
+    secrets = load_secrets(args.secrets)
+    client = github_client(secrets)
+    store = repo_store(secrets)
+    repos, orgs = parse_repo_input(args.repos, secrets['USERNAME'])
+    for org in orgs:
+        repos += [(org, name) for name in client.list_repos(org)]
+    spreadsheet_ids = [extract_id_from_url(url) for url in args.sheet]
+    http_client = sheets_client(secrets).http_client if spreadsheet_ids else None
+
+    summary = run_batch(
+        client, store, list(dict.fromkeys(repos)), spreadsheet_ids, http_client,
+        args.out, args.format, args.processes, timedelta(minutes=args.max_age),
+    )
+    if args.metrics_file:
+        registry.write_prometheus(args.metrics_file)
+    print(
+        f"wrote metrics for {len(summary['repos'])} repos and {len(summary['sprints'])} sprints to {args.out} "
+        f"({client.request_count} GitHub requests)"
+    )
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from dashboard.instrument import count, registry
+
+
+# memory each FrameCache may hold before it evicts its least recently used entries
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+# disk each FrameCache may fill with Parquet files before the oldest are removed
+DEFAULT_DISK_BYTES = 1024 * 2 ** 20
+
+DEFAULT_CACHE_DIR = os.path.join('.dashboard', 'frames')
+
+
+# bytes a cached value keeps alive: frames by their deep memory usage, dicts by their items
+def footprint(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(footprint(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+# an LRU of frames (or dicts of them) bounded by memory footprint rather than entry
+# count, with an optional TTL. Entries may belong to a group, e.g. a repo, and storing
+# a new entry of a group drops the one it supersedes. With a directory, frames are
+# also written there as Parquet, so other server processes (and restarts) read them
+# back instead of rebuilding them
+class FrameCache:
+    def __init__(self, name, max_bytes=DEFAULT_MAX_BYTES, ttl=None, directory=None,
+                 disk_bytes=DEFAULT_DISK_BYTES, clock=time.monotonic):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl.total_seconds() if hasattr(ttl, 'total_seconds') else ttl
+        self.directory = os.path.join(directory, name) if directory else None
+        self.disk_bytes = disk_bytes
+        self.clock = clock
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size, stored_at, group)
+        self._groups = {}
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest() + '.parquet')
+
+    def _expired(self, stored_at, now):
+        return self.ttl is not None and now - stored_at >= self.ttl
+
+    def _drop(self, key):
+        value, size, _, group = self._entries.pop(key)
+        self.bytes -= size
+        if self._groups.get(group) == key:
+            del self._groups[group]
+
+    def get(self, key, group=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[2], self.clock()):
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+        return self._read_disk(key, group)
+
+    def _read_disk(self, key, group):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) >= self.ttl:
+                return None
+            value = pd.read_parquet(path)
+        except (OSError, ValueError):
+            return None
+        count('cache_disk_hits_total', cache=self.name)
+        self._remember(key, value, group)
+        return value
+
+    def put(self, key, value, group=None):
+        superseded = self._remember(key, value, group)
+        if self.directory and isinstance(value, pd.DataFrame):
+            self._write_disk(key, value)
+            if superseded is not None:
+                self._remove_disk(superseded)
+        return value
+
+    # keep `value` in memory; returns the key of the group entry it replaced, if any
+    def _remember(self, key, value, group):
+        size = footprint(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            superseded = self._groups.get(group) if group is not None else None
+            if superseded == key:
+                superseded = None
+            elif superseded is not None and superseded in self._entries:
+                self._drop(superseded)
+            # a value bigger than the whole budget is handed back but not kept
+            if size > self.max_bytes:
+                return superseded
+            self._entries[key] = (value, size, self.clock(), group)
+            if group is not None:
+                self._groups[group] = key
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                count('cache_evictions_total', cache=self.name)
+            registry.gauge('cache_bytes', self.bytes, cache=self.name)
+            registry.gauge('cache_entries', len(self._entries), cache=self.name)
+        return superseded
+
+    def _write_disk(self, key, value):
+        # written under a temporary name and renamed, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            value.to_parquet(tmp, index=False)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            os.remove(tmp)
+            raise
+        self._prune_disk()
+
+    def _remove_disk(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    # remove the oldest files once the directory is over its budget
+    def _prune_disk(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.parquet'):
+                # another server process may have removed it since the scan
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    # the cached value, or load() stored under `key`; calls and misses are counted
+    # like the st.cache_data functions
+    def get_or_load(self, key, load, group=None):
+        count('cache_calls_total', cache=self.name)
+        value = self.get(key, group)
+        if value is None:
+            count('cache_misses_total', cache=self.name)
+            value = self.put(key, load(), group)
+        return value
+
+    # the (key, value) a group last stored in memory, e.g. to serve while its successor loads
+    def latest(self, group):
+        with self._lock:
+            key = self._groups.get(group)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or self._expired(entry[2], self.clock()):
+                return None
+            return key, entry[0]
+
+    # forget a group's entry, e.g. before a forced reload
+    def discard(self, group):
+        with self._lock:
+            key = self._groups.get(group)
+            if key is not None and key in self._entries:
+                self._drop(key)
+        if key is not None and self.directory:
+            self._remove_disk(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self.bytes = 0
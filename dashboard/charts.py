@@ -0,0 +1,280 @@
+import math
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from dashboard.metrics import pr_total_duration
+
+
+# repos per row when PR charts are faceted by repo
+FACET_COLUMNS = 3
+
+# above this many rows a chart is aggregated or drawn with WebGL instead of one SVG mark per row
+MAX_MARKS = 300
+
+# rows kept by name when a chart falls back to top-N plus an "Other" bucket
+TOP_N = 20
+
+# serialized figure size the page should stay under, in bytes
+PAYLOAD_BUDGET = 1_000_000
+
+# colours of the risk types, by their lower-cased sheet value
+RISK_COLORS = {
+    'risk': 'red',
+    'no risks': 'green',
+    'not yet identified': 'yellow',
+}
+
+
+def facet_rows(count):
+    return math.ceil(count / FACET_COLUMNS)
+
+
+# px keyword arguments that facet a PR chart by repo, or nothing for a single repo
+def repo_facet(repo_count):
+    if repo_count <= 1:
+        return {}
+    return dict(facet_col='Repo', facet_col_wrap=FACET_COLUMNS, height=350 * facet_rows(repo_count))
+
+
+# size of the JSON Plotly sends to the browser for this figure
+def figure_payload_bytes(fig):
+    return len(fig.to_json())
+
+
+# the n largest rows by `value`, plus one row summing the rest
+def top_n_with_other(df, value, n=TOP_N, other=None):
+    top = df.nlargest(n, value)
+    rest = df.drop(top.index)
+    if rest.empty:
+        return top
+    other = dict(other or {}, **{value: rest[value].sum()})
+    return pd.concat([top, pd.DataFrame([other])], ignore_index=True)
+
+
+def _duration_pie(group):
+    if len(group) > MAX_MARKS:
+        group = top_n_with_other(group, 'PR Duration', other={'PR Title': f"Other ({len(group) - TOP_N} PRs)"})
+    return go.Pie(labels=group['PR Title'], values=group['PR Duration'], hole=0.5)
+
+
+def _percentiles(repo_df):
+    p50, p90 = repo_df['PR Duration'].quantile([0.5, 0.9])
+    return f"PR Duration median {p50:.1f} h, p90 {p90:.1f} h"
+
+
+# donut of PR Duration per PR, one donut per repo when several repos are loaded;
+# large repos keep their longest PRs and fold the rest into "Other"
+def pr_duration_figure(repo_df):
+    groups = list(repo_df.groupby('Repo', sort=False)) if 'Repo' in repo_df else [(None, repo_df)]
+    if len(groups) == 1:
+        fig = go.Figure(data=[_duration_pie(repo_df)])
+        # Update layout to add text inside the hollow area
+        fig.update_layout(
+            annotations=[dict(text=f"{pr_total_duration(repo_df):.2f} hours", x=0.5, y=0.5, font_size=20, showarrow=False)]
+        )
+    else:
+        rows = facet_rows(len(groups))
+        cols = min(FACET_COLUMNS, len(groups))
+        fig = make_subplots(
+            rows=rows,
+            cols=cols,
+            specs=[[{'type': 'domain'}] * cols for _ in range(rows)],
+            subplot_titles=[f"{repo}: {pr_total_duration(group):.2f} hours" for repo, group in groups],
+        )
+        for i, (repo, group) in enumerate(groups):
+            fig.add_trace(_duration_pie(group).update(name=repo), row=i // cols + 1, col=i % cols + 1)
+        fig.update_layout(height=350 * rows, showlegend=False)
+
+    if len(repo_df) > MAX_MARKS:
+        fig.update_layout(title=_percentiles(repo_df))
+    return fig
+
+
+# bar per PR, or a WebGL scatter over the PR open date once there are too many bars
+def pr_resolution_figure(repo_df, facet):
+    if len(repo_df) <= MAX_MARKS:
+        fig = px.bar(
+            repo_df,
+            x='PR Title',
+            y='PR Comments Resolved Duration',
+            title="PR Comments Resolved Duration",
+            **facet,
+        )
+        fig.update_layout(bargap=0.5)
+        fig.update_layout(xaxis_title='PR Title', yaxis_title='Resolution Time (hours)')
+    else:
+        fig = px.scatter(
+            repo_df.dropna(subset=['PR Comments Resolved Duration']),
+            x='PR Opened Date',
+            y='PR Comments Resolved Duration',
+            hover_name='PR Title',
+            render_mode='webgl',
+            title="PR Comments Resolved Duration",
+            **facet,
+        )
+        fig.update_layout(xaxis_title='PR Opened Date', yaxis_title='Resolution Time (hours)')
+    if facet:
+        fig.update_xaxes(matches=None, showticklabels=False)
+    return fig
+
+
+# bar per PR, or PRs counted per comment count once there are too many bars
+def pr_comment_count_figure(repo_df, facet):
+    if len(repo_df) <= MAX_MARKS:
+        fig = px.bar(
+            repo_df,
+            x='PR Title',
+            y='total Comments in Pr',
+            title="PR Comments Count",
+            **facet,
+        )
+        fig.update_layout(xaxis_title='PR Title', yaxis_title='total Comments in Pr', yaxis=dict(
+            tickmode='linear',
+            tick0=0,
+            dtick=1
+        ))
+        if facet:
+            fig.update_xaxes(matches=None, showticklabels=False)
+    else:
+        keys = ['Repo', 'total Comments in Pr'] if facet else ['total Comments in Pr']
+        counts = repo_df.groupby(keys, observed=True).size().reset_index(name='PRs')
+        fig = px.bar(counts, x='total Comments in Pr', y='PRs', title="PRs by Comment Count", **facet)
+        fig.update_layout(xaxis_title='total Comments in Pr', yaxis_title='PRs')
+    fig.update_traces(marker_color='lightgray')
+    fig.update_layout(bargap=0.6)
+    return fig
+
+
+# estimated vs actual hours for the whole team
+def velocity_figure(total_estimate, total_actual, time_status):
+    fig = px.bar(
+        x=['Estimated', 'Actual'],
+        y=[total_estimate, total_actual],
+        labels={'x': 'Type of Effort', 'y': 'Effort (hours/story points)'},
+        title='Team Sprint Velocity ' f"Sprint status: {time_status}",
+        text=[total_estimate, total_actual],
+        color=['Estimated', 'Actual'],
+    )
+    fig.update_layout(bargap=0.7)
+    fig.update_traces(textposition='outside')
+    fig.update_layout(showlegend=False, xaxis_title='', yaxis_title='Effort (hours)')
+    return fig
+
+
+# estimated vs actual hours per developer
+def dev_velocity_figure(dev_contributions):
+    fig = px.bar(
+        dev_contributions,
+        x='ASSIGNEE',
+        y=['total_estimate', 'total_actual'],
+        barmode='group',
+        title='Individual Developer Velocity',
+        text_auto=True,
+        labels={'variable': 'Type of Effort', 'value': 'Effort (hours)'},
+    )
+    fig.update_layout(yaxis_title='Effort (hours)', xaxis_title='Developer')
+    return fig
+
+
+def risk_figure(risk_counts):
+    fig = px.pie(risk_counts, names='Risk Type', values='Count', title='Risk Distribution', color_discrete_map=RISK_COLORS)
+    fig.update_traces(marker=dict(colors=['green', 'red', 'yellow']))
+    return fig
+
+
+def _other_task(count):
+    return {'TASK_NAME': f"{count} more tasks", 'TASK-NAME': f"Other ({count})", 'SHORT_TASK_NAME': f"Other ({count})", 'PULL': 0.0}
+
+
+# actual time per task, the longest TOP_N plus "Other" for big sheets
+def dev_time_figure(tasks):
+    if len(tasks) > MAX_MARKS:
+        tasks = top_n_with_other(tasks, 'Actual', other=_other_task(len(tasks) - TOP_N))
+    fig = px.bar(
+        tasks,
+        x='TASK-NAME',
+        y='Actual',
+        title="Dev Time",
+        hover_data={'TASK-NAME': False, 'TASK_NAME': True}
+    )
+    fig.update_layout(xaxis_title='Task Name', yaxis_title='Dev Time (hours)')
+    return fig
+
+
+# estimate per task, unfinished tasks pulled out; the largest TOP_N plus "Other" for big sheets
+def task_distribution_figure(tasks):
+    if len(tasks) > MAX_MARKS:
+        tasks = top_n_with_other(tasks, 'ESTIMATE', other=_other_task(len(tasks) - TOP_N))
+    fig = px.pie(
+        tasks,
+        names='SHORT_TASK_NAME',
+        values='ESTIMATE',
+        title='Task Distribution',
+    )
+    fig.update_traces(
+        pull=tasks['PULL'],
+        textposition='inside',
+        textinfo='label+value',
+        textfont_size=14,
+        hovertemplate='%{customdata[0]}<br>Estimate: %{value}hr',
+        customdata=tasks[['TASK_NAME']],
+    )
+    return fig
+
+
+# team velocity per sprint, in worksheet order; 1 is on estimate
+def velocity_trend_figure(trend):
+    fig = px.line(trend, x='Sprint', y='velocity', markers=True, title='Velocity Trend',
+                  hover_data=['total_estimate', 'total_actual'])
+    fig.add_hline(y=1, line_dash='dot', line_color='grey')
+    fig.update_layout(xaxis_title='Sprint', yaxis_title='Velocity (actual / estimate)')
+    return fig
+
+
+# estimated minus actual hours per sprint; below zero the sprint ran over
+def dev_time_trend_figure(trend):
+    fig = px.bar(
+        trend,
+        x='Sprint',
+        y='time_difference',
+        title='Dev Time Difference Trend',
+        color=trend['time_difference'].ge(0).map({True: 'Ahead of estimate', False: 'Over estimate'}),
+        color_discrete_map={'Ahead of estimate': 'green', 'Over estimate': 'red'},
+        hover_data=['tasks', 'unfinished_tasks'],
+    )
+    fig.update_layout(xaxis_title='Sprint', yaxis_title='Estimate - Actual (hours)', legend_title_text='')
+    return fig
+
+
+# tasks per risk type per sprint, stacked
+def risk_trend_figure(trend):
+    risks = pd.DataFrame(
+        [(sprint, risk, count) for sprint, counts in zip(trend['Sprint'], trend['risks']) for risk, count in counts.items()],
+        columns=['Sprint', 'Risk Type', 'Count'],
+    )
+    fig = px.bar(risks, x='Sprint', y='Count', color='Risk Type', title='Risk Trend',
+                 color_discrete_map=RISK_COLORS, category_orders={'Sprint': list(trend['Sprint'])})
+    fig.update_layout(xaxis_title='Sprint', yaxis_title='Tasks')
+    return fig
+
+
+# tasks linked to PRs by ticket ID: how far the task ran over its estimate against
+# how long its PRs took; WebGL once there are more points than MAX_MARKS
+def task_pr_figure(task_prs):
+    fig = px.scatter(
+        task_prs.dropna(subset=['Dev Time Difference', 'PR Duration']),
+        x='Dev Time Difference',
+        y='PR Duration',
+        color='Review Time',
+        hover_name='TASK_NAME',
+        hover_data=['Ticket', 'ESTIMATE', 'Actual', 'PRs'],
+        render_mode='webgl' if len(task_prs) > MAX_MARKS else 'svg',
+        title='Dev Time Difference vs PR Duration',
+    )
+    fig.update_layout(
+        xaxis_title='Actual - Estimate (hours)', yaxis_title='PR Duration (hours)', coloraxis_colorbar_title='Review (hours)'
+    )
+    return fig
@@ -0,0 +1,20 @@
+import argparse
+
+from dashboard import batch, warmup
+
+
+# python -m dashboard <command>; every command reads the Streamlit secrets file
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m dashboard', description="Dashboard data without the Streamlit UI.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    metrics = commands.add_parser('metrics', help="compute PR and sprint metrics in one batch and write them to files")
+    batch.add_arguments(metrics)
+    metrics.set_defaults(run=batch.run)
+
+    warm = commands.add_parser('warmup', help="keep repos and sheets warm in the local store")
+    warmup.add_arguments(warm)
+    warm.set_defaults(run=warmup.run)
+
+    args = parser.parse_args(argv)
+    args.run(args)
@@ -0,0 +1,250 @@
+import copy
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from dashboard.instrument import count, registry, timed
+from dashboard.rate_limit import DEFAULT_HOURLY_BUDGET, TokenBucket
+
+
+# base URL
+BASE_URL = "https://api.github.com"
+
+# how many GitHub requests may be in flight at once
+DEFAULT_MAX_WORKERS = 8
+
+PER_PAGE = 100
+
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+
+# longer waits than this (e.g. an exhausted hourly limit) fail instead of blocking the page
+MAX_RETRY_WAIT = 60
+
+
+class GitHubAPIError(Exception):
+    def __init__(self, response):
+        try:
+            message = response.json().get('message', response.reason)
+        except ValueError:
+            message = response.reason
+        super().__init__(f"GitHub API returned {response.status_code} for {response.url}: {message}")
+        self.status_code = response.status_code
+
+
+def _page_url(url, page):
+    parts = urlparse(url)
+    query = parse_qs(parts.query)
+    query['page'] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def _last_page(response):
+    last_url = response.links.get('last', {}).get('url')
+    if not last_url:
+        return None
+    return int(parse_qs(urlparse(last_url).query)['page'][0])
+
+
+def _is_rate_limited(response):
+    return (
+        'Retry-After' in response.headers
+        or response.headers.get('X-RateLimit-Remaining') == '0'
+        or 'rate limit' in response.text.lower()
+    )
+
+
+# seconds to wait before retrying, or None when the response shouldn't be retried
+def _retry_delay(response, attempt):
+    status = response.status_code
+    if not (status == 429 or status >= 500 or (status == 403 and _is_rate_limited(response))):
+        return None
+    if 'Retry-After' in response.headers:
+        return float(response.headers['Retry-After'])
+    if response.headers.get('X-RateLimit-Remaining') == '0' and 'X-RateLimit-Reset' in response.headers:
+        return max(0.0, float(response.headers['X-RateLimit-Reset']) - time.time())
+    return BACKOFF_BASE * 2 ** attempt * random.uniform(0.5, 1.0)
+
+
+class GitHubClient:
+    def __init__(self, username, token, base_url=BASE_URL, max_workers=DEFAULT_MAX_WORKERS,
+                 hourly_budget=DEFAULT_HOURLY_BUDGET, max_retries=DEFAULT_MAX_RETRIES):
+        self.username = username
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        # hourly_budget=None turns pacing off, e.g. against a local mock server
+        self.bucket = TokenBucket(hourly_budget) if hourly_budget else None
+
+        # one keep-alive session shared by every worker thread
+        self.session = requests.Session()
+        self.session.auth = (username, token)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # caps in-flight requests even when paginated fetches nest inside map()
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+        self.stats = {'requests': 0, 'retries': 0, 'throttled_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+        self._parent = None
+
+    @property
+    def request_count(self):
+        return self.stats['requests']
+
+    def _record(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+        if self._parent:
+            self._parent._record(name, amount)
+
+    # a view that shares the session, pacing and limits but also keeps its own
+    # stats, so concurrent jobs can each tell how many requests they made
+    def scoped(self):
+        scoped = copy.copy(self)
+        scoped.stats = {name: 0 for name in self.stats}
+        scoped._stats_lock = threading.Lock()
+        scoped._parent = self
+        return scoped
+
+    def _observe_rate_limit(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if self.bucket and remaining is not None and reset is not None:
+            self.bucket.observe(int(remaining), float(reset) - time.time())
+
+    def request(self, method, url, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            if self.bucket:
+                self._record('throttled_seconds', self.bucket.acquire())
+            self._record('requests')
+            with self._slots:
+                start = time.perf_counter()
+                response = self.session.request(method, url, **kwargs)
+                registry.observe('http_request_seconds', time.perf_counter() - start, service='github')
+            count('http_requests_total', service='github', status=response.status_code)
+            count('http_response_bytes_total', len(response.content), service='github')
+            self._observe_rate_limit(response)
+
+            delay = _retry_delay(response, attempt)
+            if delay is None or delay > MAX_RETRY_WAIT or attempt == self.max_retries:
+                break
+            self._record('retries')
+            self._record('throttled_seconds', delay)
+            time.sleep(delay)
+
+        # never let an error body be mistaken for a page of results
+        if response.status_code >= 400:
+            raise GitHubAPIError(response)
+        return response
+
+    def get(self, url, headers=None):
+        return self.request('GET', url, headers=headers)
+
+    def post(self, url, json):
+        return self.request('POST', url, json=json)
+
+    def imap(self, func, items):
+        # run func over items on the bounded worker pool, yielding results in input
+        # order as soon as each one (and every one before it) is done
+        items = list(items)
+        if self.max_workers <= 1 or len(items) <= 1:
+            yield from map(func, items)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from pool.map(func, items)
+
+    def map(self, func, items):
+        return list(self.imap(func, items))
+
+    # (page, page number, page count) as each page arrives; the page count is None
+    # when GitHub only sends "next" links
+    def iter_paginated(self, url):
+        # the first page's Link header tells us how many pages there are,
+        # so the remaining ones can be requested in parallel
+        response = self.get(url)
+        last_page = _last_page(response)
+        yield response.json(), 1, last_page
+        if last_page is not None:
+            urls = [_page_url(url, page) for page in range(2, last_page + 1)]
+            pages = self.imap(lambda page_url: self.get(page_url).json(), urls)
+            for number, page in enumerate(pages, start=2):
+                yield page, number, last_page
+            return
+
+        # no "last" link: walk the "next" links one by one
+        url = response.links.get('next', {}).get('url')
+        number = 1
+        while url:
+            response = self.get(url)
+            number += 1
+            yield response.json(), number, None
+            url = response.links.get('next', {}).get('url')
+
+    def get_paginated(self, url):
+        return [item for page, _, _ in self.iter_paginated(url) for item in page]
+
+    def repo_url(self, owner, repo_name, path):
+        return f"{self.base_url}/repos/{owner}/{repo_name}/{path}"
+
+    # names of the non-archived repos of an organization, or of a user account
+    def list_repos(self, owner):
+        try:
+            repos = self.get_paginated(f"{self.base_url}/orgs/{owner}/repos?per_page={PER_PAGE}")
+        except GitHubAPIError as e:
+            if e.status_code != 404:
+                raise
+            repos = self.get_paginated(f"{self.base_url}/users/{owner}/repos?per_page={PER_PAGE}")
+        return [repo['name'] for repo in repos if not repo.get('archived')]
+
+    def pull_requests_url(self, owner, repo_name):
+        return self.repo_url(owner, repo_name, f"pulls?state=all&per_page={PER_PAGE}")
+
+    # fetch pr for a specific repository
+    @timed('fetch_pull_requests')
+    def fetch_pull_requests(self, owner, repo_name):
+        return self.get_paginated(self.pull_requests_url(owner, repo_name))
+
+    # fetch comments for a specific PR
+    @timed('fetch_pr_comments')
+    def fetch_pr_comments(self, owner, repo_name, pr_number):
+        url = self.repo_url(owner, repo_name, f"issues/{pr_number}/comments?per_page={PER_PAGE}")
+        return self.get_paginated(url)
+
+    def repo_comments_url(self, owner, repo_name, since=None):
+        path = f"issues/comments?sort=created&direction=asc&per_page={PER_PAGE}"
+        if since:
+            path += f"&since={since}"
+        return self.repo_url(owner, repo_name, path)
+
+    # fetch every issue/PR comment in the repository, oldest first
+    @timed('fetch_repo_comments')
+    def fetch_repo_comments(self, owner, repo_name, since=None):
+        return self.get_paginated(self.repo_comments_url(owner, repo_name, since))
+
+    # fetch comments for many PRs concurrently, keyed by PR number
+    def fetch_comments_for_prs(self, owner, repo_name, pr_numbers):
+        pr_numbers = list(pr_numbers)
+        comments = self.map(lambda number: self.fetch_pr_comments(owner, repo_name, number), pr_numbers)
+        return dict(zip(pr_numbers, comments))
+
+
+def issue_number(comment):
+    return int(comment['issue_url'].rsplit('/', 1)[-1])
+
+
+# first comment time and comment count per issue/PR number
+def summarize_comments(comments):
+    summary = {}
+    for comment in comments:
+        number = issue_number(comment)
+        first_created_at, count = summary.get(number, (comment['created_at'], 0))
+        summary[number] = (min(first_created_at, comment['created_at']), count + 1)
+    return summary
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from dashboard.normalize import normalize_graphql_nodes
+
+
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: 100, after: $cursor, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        title
+        headRefName
+        state
+        createdAt
+        updatedAt
+        mergedAt
+        comments(first: 1) { totalCount nodes { createdAt } }
+      }
+    }
+  }
+}
+"""
+
+class GraphQLError(Exception):
+    pass
+
+
+# page through a repo's PRs 100 at a time, comment metadata included, yielding each page's nodes
+def iter_pull_requests_graphql(client, owner, repo_name):
+    url = f"{client.base_url}/graphql"
+    variables = {'owner': owner, 'name': repo_name, 'cursor': None}
+    while True:
+        payload = client.post(url, json={'query': PULL_REQUESTS_QUERY, 'variables': variables}).json()
+        if payload.get('errors'):
+            raise GraphQLError(payload['errors'][0].get('message', 'GraphQL query failed'))
+        pull_requests = payload['data']['repository']['pullRequests']
+        yield pull_requests['nodes']
+        if not pull_requests['pageInfo']['hasNextPage']:
+            return
+        variables['cursor'] = pull_requests['pageInfo']['endCursor']
+
+
+def fetch_pull_requests_graphql(client, owner, repo_name):
+    return [node for page in iter_pull_requests_graphql(client, owner, repo_name) for node in page]
+
+
+# normalized page by page, so a repo's raw nodes are never all held at once
+def fetch_repo_graphql(client, owner, repo_name):
+    pages = [normalize_graphql_nodes(page) for page in iter_pull_requests_graphql(client, owner, repo_name)]
+    return pd.concat(pages, ignore_index=True)
+
+
+def fetch_repos_graphql(client, repos):
+    return client.map(lambda repo: fetch_repo_graphql(client, *repo), repos)
@@ -0,0 +1,138 @@
+import functools
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+# prefix of every exported metric name
+METRIC_PREFIX = 'dashboard'
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in key)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + '}'
+
+
+def _metric_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', f"{METRIC_PREFIX}_{name}")
+
+
+# process-wide counters and stage timers, cheap enough for the hot path and safe
+# to update from sync threads; everything a session does adds to the same totals
+class Registry:
+    def __init__(self):
+        self._counters = {}
+        self._timers = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            count, total, longest, _ = self._timers.get(key, (0, 0.0, 0.0, 0.0))
+            self._timers[key] = (count + 1, total + seconds, max(longest, seconds), seconds)
+
+    # a value that goes up and down, e.g. the bytes a cache holds; the last one set wins
+    def gauge(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = value
+
+    # times the block, or the decorated function, into the `stage_seconds` timer
+    @contextmanager
+    def timed(self, stage, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - start, stage=stage, **labels)
+
+    def counters(self):
+        with self._lock:
+            return [(name, dict(key), value) for (name, key), value in sorted(self._counters.items())]
+
+    def gauges(self):
+        with self._lock:
+            return [(name, dict(key), value) for (name, key), value in sorted(self._gauges.items())]
+
+    # (name, labels, count, total seconds, max seconds, last seconds) per timer
+    def timers(self):
+        with self._lock:
+            return [(name, dict(key), *values) for (name, key), values in sorted(self._timers.items())]
+
+    # Prometheus text exposition format; timers become summaries without quantiles
+    # plus a _max gauge
+    def prometheus_text(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted(self._timers.items())
+            gauges = sorted(self._gauges.items())
+        lines = []
+        for name in dict.fromkeys(name for (name, _), _ in counters):
+            lines.append(f"# TYPE {_metric_name(name)} counter")
+            lines += [f"{_metric_name(name)}{_format_labels(key)} {value}" for (n, key), value in counters if n == name]
+        for name in dict.fromkeys(name for (name, _), _ in timers):
+            metric = _metric_name(name)
+            lines.append(f"# TYPE {metric} summary")
+            for (n, key), (count, total, _, _) in timers:
+                if n == name:
+                    lines.append(f"{metric}_count{_format_labels(key)} {count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {total:.6f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            lines += [f"{metric}_max{_format_labels(key)} {longest:.6f}" for (n, key), (_, _, longest, _) in timers if n == name]
+        for name in dict.fromkeys(name for (name, _), _ in gauges):
+            lines.append(f"# TYPE {_metric_name(name)} gauge")
+            lines += [f"{_metric_name(name)}{_format_labels(key)} {value}" for (n, key), value in gauges if n == name]
+        return '\n'.join(lines) + '\n'
+
+    # replace `path` in one rename, so a scraper (e.g. node_exporter's textfile
+    # collector) never reads half a file
+    def write_prometheus(self, path):
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+registry = Registry()
+count = registry.count
+timed = registry.timed
+
+
+# wrap a cache decorator (e.g. st.cache_data(ttl=...)) so its calls and misses are
+# counted and timed under `name`; the body only runs on a miss, hits are calls - misses
+def cache_metrics(name, cache):
+    def decorate(func):
+        @functools.wraps(func)
+        def load(*args, **kwargs):
+            count('cache_misses_total', cache=name)
+            with timed(f"{name} (miss)"):
+                return func(*args, **kwargs)
+
+        cached = cache(load)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            count('cache_calls_total', cache=name)
+            with timed(name):
+                return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+    return decorate
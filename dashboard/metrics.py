@@ -0,0 +1,144 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from dashboard.cache import FrameCache
+
+
+# memory the memoized metrics of distinct sheet frames may take, in bytes
+MEMO_BYTES = 64 * 2 ** 20
+
+# the sheet columns compute_sprint_metrics reads
+METRIC_COLUMNS = ['TASK_NAME', 'ASSIGNEE', 'ESTIMATE', 'ACTUAL', 'RISKS']
+
+_memo = FrameCache('sprint_metrics', max_bytes=MEMO_BYTES)
+
+
+# content hash of the columns the metrics read; joining the cells and hashing the
+# bytes once is several times cheaper than pd.util.hash_pandas_object on strings
+def frame_hash(table):
+    digest = hashlib.blake2b(digest_size=16)
+    for name in METRIC_COLUMNS:
+        digest.update('\x1f'.join(map(str, table[name].tolist())).encode())
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+# worksheets without the metric columns (notes, a backlog tab) or without tasks aren't sprints
+def is_sprint_table(table):
+    return table is not None and not table.empty and set(METRIC_COLUMNS) <= set(table.columns)
+
+
+def _plural(count, unit):
+    return f"{count} {unit}{'s' if count != 1 else ''}"
+
+
+def time_status(velocity, time_difference):
+    hours = int(abs(time_difference))
+    minutes = int((abs(time_difference) - hours) * 60)
+    if velocity > 0:
+        if hours > 0:
+            return f" Ahead of Time by {_plural(hours, 'hour')} {_plural(minutes, 'minute')}"
+        return f"**Ahead of Time** by {_plural(minutes, 'minute')}"
+    if time_difference < 0:
+        if hours > 0:
+            return f"**Behind Schedule** by {_plural(hours, 'hour')} {_plural(minutes, 'minute')}"
+        return f"**Behind Schedule** by {_plural(minutes, 'minute')}"
+    return "**On Time**"
+
+
+# every sprint aggregate the charts need, from the sheet frame as loaded
+def compute_sprint_metrics(table):
+    actual = pd.to_numeric(table['ACTUAL'], errors='coerce')  # invalid values become NaN
+    estimate = pd.to_numeric(table['ESTIMATE'], errors='coerce')
+    has_actual = actual.notna()
+
+    # one grouped pass gives both the per-developer sums and, summed again, the
+    # team totals (which only count tasks that have an actual time yet)
+    per_assignee = pd.DataFrame({
+        'ASSIGNEE': table['ASSIGNEE'],
+        'total_estimate': estimate,
+        'total_actual': actual,
+        'finished_estimate': estimate.where(has_actual),
+    }).groupby('ASSIGNEE', dropna=False, sort=True).sum()
+
+    total_estimate = per_assignee['finished_estimate'].sum()
+    total_actual = per_assignee['total_actual'].sum()
+    velocity = total_actual / total_estimate if total_estimate else float('nan')
+    time_difference = total_estimate - total_actual
+
+    dev_contributions = per_assignee.loc[per_assignee.index.notna(), ['total_estimate', 'total_actual']].reset_index()
+    dev_contributions['velocity'] = dev_contributions['total_actual'] / dev_contributions['total_estimate']
+
+    risk_counts = table['RISKS'].str.lower().value_counts().reset_index()
+    risk_counts.columns = ['Risk Type', 'Count']
+
+    short_names = table['TASK_NAME'].str.slice(0, 10) + '...'
+    tasks = pd.DataFrame({
+        'TASK_NAME': table['TASK_NAME'],
+        'TASK-NAME': short_names,
+        'SHORT_TASK_NAME': short_names,
+        'ESTIMATE': estimate,
+        'Actual': actual,
+        'Dev Time Difference': actual - estimate,
+        # unfinished tasks are pulled out of the task pie
+        'PULL': np.where(has_actual, 0.0, 0.1),
+    })
+
+    return {
+        'total_estimate': total_estimate,
+        'total_actual': total_actual,
+        'velocity': velocity,
+        'time_difference': time_difference,
+        'time_status': time_status(velocity, time_difference),
+        'dev_contributions': dev_contributions,
+        'risk_counts': risk_counts,
+        'tasks': tasks,
+    }
+
+
+# the sprint aggregates as plain numbers, e.g. for a JSON export
+def sprint_summary(metrics):
+    return {
+        'total_estimate': _number(metrics['total_estimate']),
+        'total_actual': _number(metrics['total_actual']),
+        'velocity': _number(metrics['velocity']),
+        'time_difference': _number(metrics['time_difference']),
+        'tasks': len(metrics['tasks']),
+        'unfinished_tasks': int((metrics['tasks']['PULL'] > 0).sum()),
+        'risks': dict(zip(metrics['risk_counts']['Risk Type'], metrics['risk_counts']['Count'].tolist())),
+    }
+
+
+# time between the first PR opened and the last PR merged, in hours
+def pr_total_duration(repo_df):
+    first_pr_created_at = repo_df['PR Opened Date'].min()
+    last_pr_merged_at = repo_df['PR Merged Date'].max()
+    return (last_pr_merged_at - first_pr_created_at).total_seconds() / 3600
+
+
+# PR timing aggregates of a frame with add_pr_durations applied, as plain numbers
+def pr_metrics(repo_df):
+    durations = repo_df['PR Duration'].dropna()
+    resolutions = repo_df['PR Comments Resolved Duration'].dropna()
+    return {
+        'prs': len(repo_df),
+        'merged_prs': len(durations),
+        'comments': int(repo_df['total Comments in Pr'].sum()),
+        'total_duration_hours': _number(pr_total_duration(repo_df)) if len(durations) else None,
+        'median_pr_duration_hours': _number(durations.median()),
+        'p90_pr_duration_hours': _number(durations.quantile(0.9)),
+        'median_resolution_hours': _number(resolutions.median()),
+    }
+
+
+# NaN (nothing to aggregate) becomes None, so exports stay valid JSON
+def _number(value):
+    return None if pd.isna(value) else float(value)
+
+
+# compute_sprint_metrics memoized on the frame's content, so reruns of an
+# unchanged sheet only re-render; the returned frames are shared, don't mutate them
+def sprint_metrics(table):
+    return _memo.get_or_load(frame_hash(table), lambda: compute_sprint_metrics(table))
@@ -0,0 +1,91 @@
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+
+REPO_FRAME_COLUMNS = [
+    'PR Number', 'PR Title', 'PR Branch', 'PR State', 'Created At', 'Updated At', 'Merged At',
+    'First Comment At', 'total Comments in Pr',
+]
+
+TIME_COLUMNS = ['Created At', 'Updated At', 'Merged At', 'First Comment At']
+
+# fixed categories so frames of several repos concatenate without falling back to object
+PR_STATE = pd.CategoricalDtype(['open', 'closed'])
+
+# GraphQL reports merged PRs separately; REST folds them into "closed"
+REST_STATES = {'OPEN': 'open', 'CLOSED': 'closed', 'MERGED': 'closed'}
+
+
+# GitHub timestamps to naive UTC datetime64 in one vectorized parse
+def to_utc_naive(values):
+    values = list(values)
+    # GitHub sends "YYYY-MM-DDTHH:MM:SSZ"; without the Z numpy parses those in C,
+    # several times faster than pd.to_datetime
+    if all(value is None or value.endswith('Z') for value in values):
+        return pd.Series(np.array([value and value[:-1] for value in values], dtype='datetime64[s]'))
+    return pd.to_datetime(pd.Series(values, dtype=object), utc=True, format='ISO8601').dt.tz_convert(None)
+
+
+# the typed PR frame every loader produces, from one list/array per column
+def typed_repo_frame(columns):
+    df = pd.DataFrame({
+        'PR Number': np.asarray(columns['PR Number'], dtype=np.int32),
+        'PR Title': pd.Series(columns['PR Title'], dtype=object),
+        'PR Branch': pd.Series(columns['PR Branch'], dtype=object),
+        'PR State': pd.Series(columns['PR State'], dtype=PR_STATE),
+        **{name: to_utc_naive(columns[name]) for name in TIME_COLUMNS},
+        'total Comments in Pr': np.asarray(columns['total Comments in Pr'], dtype=np.int32),
+    })
+    return df[REPO_FRAME_COLUMNS]
+
+
+# raw REST pull request pages plus a {number: (first comment at, count)} summary
+def normalize_pulls(pages, comment_summary=None):
+    prs = list(chain.from_iterable(pages))
+    comment_summary = comment_summary or {}
+    comments = [comment_summary.get(pr['number'], (None, 0)) for pr in prs]
+    return typed_repo_frame({
+        'PR Number': [pr['number'] for pr in prs],
+        'PR Title': [pr['title'] for pr in prs],
+        'PR Branch': [pr['head']['ref'] for pr in prs],
+        'PR State': [pr['state'] for pr in prs],
+        'Created At': [pr['created_at'] for pr in prs],
+        'Updated At': [pr['updated_at'] for pr in prs],
+        'Merged At': [pr['merged_at'] for pr in prs],
+        'First Comment At': [first for first, _ in comments],
+        'total Comments in Pr': [count for _, count in comments],
+    })
+
+
+# pullRequests nodes from the GraphQL loader
+def normalize_graphql_nodes(nodes):
+    return typed_repo_frame({
+        'PR Number': [pr['number'] for pr in nodes],
+        'PR Title': [pr['title'] for pr in nodes],
+        'PR Branch': [pr['headRefName'] for pr in nodes],
+        'PR State': [REST_STATES[pr['state']] for pr in nodes],
+        'Created At': [pr['createdAt'] for pr in nodes],
+        'Updated At': [pr['updatedAt'] for pr in nodes],
+        'Merged At': [pr['mergedAt'] for pr in nodes],
+        'First Comment At': [pr['comments']['nodes'][0]['createdAt'] if pr['comments']['nodes'] else None for pr in nodes],
+        'total Comments in Pr': [pr['comments']['totalCount'] for pr in nodes],
+    })
+
+
+# rows as read back from the local store, in REPO_FRAME_COLUMNS order
+def normalize_rows(rows):
+    columns = list(zip(*rows)) if rows else [[] for _ in REPO_FRAME_COLUMNS]
+    return typed_repo_frame(dict(zip(REPO_FRAME_COLUMNS, columns)))
+
+
+# derived PR timings in hours, on whole columns at once
+def add_pr_durations(df):
+    hours = np.timedelta64(1, 'h')
+    return df.assign(**{
+        'PR Opened Date': df['Created At'],
+        'PR Merged Date': df['Merged At'],
+        'PR Duration': (df['Merged At'] - df['Created At']) / hours,
+        'PR Comments Resolved Duration': (df['Merged At'] - df['First Comment At']) / hours,
+    })
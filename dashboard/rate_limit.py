@@ -0,0 +1,60 @@
+import threading
+import time
+
+
+# GitHub's REST budget for an authenticated user
+DEFAULT_HOURLY_BUDGET = 5000
+
+# requests that may go out back to back before GitHub has reported what is left
+DEFAULT_BURST = 100
+
+# longest single sleep while waiting for a token, so waiters notice a new window
+WAIT_STEP = 1.0
+
+
+# token bucket that spreads requests so the hourly budget isn't spent in one burst.
+# It holds up to the whole budget: whenever GitHub starts a new window and reports
+# X-RateLimit-Remaining, that many (at most the budget) go out unpaced, and only when
+# they run out are requests paced at what is left until the window resets
+class TokenBucket:
+    def __init__(self, hourly_budget=DEFAULT_HOURLY_BUDGET, burst=DEFAULT_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.configured_rate = hourly_budget / 3600
+        self.rate = self.configured_rate
+        self.capacity = hourly_budget
+        self.tokens = min(burst, hourly_budget)
+        self.reset_at = None
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # take one token, sleeping until one is available; returns seconds waited
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = min((1 - self.tokens) / self.rate, WAIT_STEP)
+            self._sleep(wait)
+            waited += wait
+
+    # the first report of a window seeds the bucket with what is left of the budget;
+    # later ones only ever lower it, and slow the refill down to what is left until the reset
+    def observe(self, remaining, reset_in):
+        with self._lock:
+            self._refill()
+            reset_at = self._clock() + reset_in
+            # reset times are whole seconds, hence the slack
+            if self.reset_at is None or reset_at > self.reset_at + 2:
+                self.tokens = min(self.capacity, remaining)
+                self.reset_at = reset_at
+            self.rate = min(self.configured_rate, max(remaining, 1) / max(reset_in, 1))
+            self.tokens = min(self.tokens, remaining)
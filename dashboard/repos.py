@@ -0,0 +1,36 @@
+import re
+
+
+# parse the repo input into (owner, repo) pairs and org names
+#
+#   "dashboard"                          -> (default_owner, "dashboard")
+#   "octo/dashboard"                     -> ("octo", "dashboard")
+#   "https://github.com/octo/dashboard"  -> ("octo", "dashboard")
+#   "git@github.com:octo/dashboard.git"  -> ("octo", "dashboard")
+#   "https://github.com/octo", "org:octo" -> every repo of "octo"
+#
+# several entries may be given, separated by commas, spaces or newlines
+def parse_repo_input(text, default_owner):
+    repos = []
+    orgs = []
+    for entry in re.split(r'[,\s]+', text.strip()):
+        if not entry:
+            continue
+        if entry.startswith('org:'):
+            orgs.append(entry[len('org:'):])
+            continue
+        if 'github.com' in entry:
+            entry = entry.split('github.com', 1)[1]
+        # the ':' of an SSH remote (git@github.com:octo/...) isn't part of the owner
+        parts = [part for part in entry.lstrip(':').strip('/').split('/') if part]
+        if entry.startswith(('/', ':')) and len(parts) == 1:
+            orgs.append(parts[0])
+        elif len(parts) == 1:
+            repos.append((default_owner, parts[0].removesuffix('.git')))
+        elif parts:
+            repos.append((parts[0], parts[1].removesuffix('.git')))
+    return repos, orgs
+
+
+def repo_label(owner, repo_name, default_owner):
+    return repo_name if owner == default_owner else f"{owner}/{repo_name}"
@@ -0,0 +1,229 @@
+import contextlib
+import multiprocessing
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+from dashboard.cache import FrameCache
+from dashboard.instrument import count, timed
+from dashboard.metrics import compute_sprint_metrics
+from dashboard.rate_limit import DEFAULT_HOURLY_BUDGET
+from dashboard.settings import github_client, repo_store, sheets_client
+from dashboard.sync import DEFAULT_SYNC_INTERVAL, TIME_FORMAT, is_stale, repo_key, sync_repo
+from dashboard.trend import load_sprint_trend
+from dashboard.warmup import warm_worksheet
+
+
+# Serving mode: the GitHub and Sheets work and the frame and metric computation of
+# every session run on a pool of worker processes, off the Streamlit process and its
+# GIL. A result is computed once per key however many sessions ask for it, kept in a
+# FrameCache, and a stale repo is served as is while its refresh runs in the background.
+
+DEFAULT_SERVICE_PROCESSES = 2
+
+# the clients and store of this worker process, set up by _init_worker
+_context = {}
+
+
+# the [google] secrets with an even share of GITHUB_HOURLY_BUDGET, for each of the
+# worker processes and the Streamlit process itself, so together they keep to it
+def split_budget(secrets, processes):
+    budget = int(secrets.get('GITHUB_HOURLY_BUDGET', DEFAULT_HOURLY_BUDGET)) // (processes + 1)
+    return {**secrets, 'GITHUB_HOURLY_BUDGET': budget}
+
+
+# the context of one worker process, built there from the [google] secrets
+def secrets_context(secrets, processes):
+    return {
+        'client': github_client(split_budget(secrets, processes)),
+        'store': repo_store(secrets),
+        # authorizing with Google is slow, so only workers that read a sheet pay for it
+        'sheets': lambda: sheets_client(secrets).http_client,
+    }
+
+
+# runs once in every worker process; clients and stores can't be pickled, so the
+# pool is handed a function that builds them, from a module other than __main__
+def _init_worker(make_context):
+    _context.update(make_context())
+
+
+def _ready():
+    return None
+
+
+# spawned processes import the parent's __main__ first, and under Streamlit that is
+# the dashboard script itself; workers are started with an empty one in its place
+@contextlib.contextmanager
+def _bare_main():
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+def _http_client():
+    if 'http_client' not in _context:
+        _context['http_client'] = _context['sheets']()
+    return _context['http_client']
+
+
+def _sync_job(owner, repo_name):
+    store = _context['store']
+    sync_repo(_context['client'], store, owner, repo_name)
+    return store.sync_state(repo_key(owner, repo_name))
+
+
+def _repo_frame_job(owner, repo_name):
+    return _context['store'].repo_frame(repo_key(owner, repo_name))
+
+
+def _sprint_job(spreadsheet_id, worksheet, revision, max_age, force):
+    store = _context['store']
+    warm_worksheet(_http_client(), store, spreadsheet_id, worksheet, revision, max_age, force)
+    return compute_sprint_metrics(store.sheet_table(spreadsheet_id, worksheet['title']))
+
+
+def _trend_job(spreadsheet_id, worksheets, revision, max_age, force):
+    return load_sprint_trend(_http_client(), _context['store'], spreadsheet_id, worksheets, revision, max_age, force)
+
+
+class FrameService:
+    def __init__(self, make_context, store, processes=DEFAULT_SERVICE_PROCESSES, frames=None,
+                 results=None, max_age=DEFAULT_SYNC_INTERVAL):
+        self.store = store
+        self.processes = processes
+        self.max_age = max_age
+        self.frames = frames or FrameCache('service_frames')
+        self.results = results or FrameCache('service_results')
+        # the last job that failed, and when; background syncs have no session to report to
+        self.last_error = None
+        self.last_error_at = None
+        self._make_context = make_context
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._pool = self._start_pool()
+
+    def _start_pool(self):
+        # spawned, not forked: the Streamlit process runs threads that a fork would copy mid-flight
+        pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self._make_context,),
+        )
+        # the pool spawns a process per job while none is idle, so this starts them all
+        with _bare_main():
+            for _ in range(self.processes):
+                pool.submit(_ready)
+        return pool
+
+    # a worker that dies (e.g. killed for memory) breaks the whole pool: its jobs fail
+    # and it takes no more, so a new one replaces it. Call with the lock held
+    def _replace_pool(self, broken):
+        if self._pool is broken:
+            count('service_pool_restarts_total')
+            self._pool = self._start_pool()
+            broken.shutdown(wait=False)
+
+    # the running job under `name`, or a new one; `then` gets the result of a new job
+    def _submit(self, name, func, *args, then=None):
+        with self._lock:
+            future = self._inflight.get(name)
+            if future is not None:
+                count('service_jobs_joined_total', job=name[0])
+                return future
+            try:
+                future = self._pool.submit(func, *args)
+            except BrokenProcessPool:
+                self._replace_pool(self._pool)
+                future = self._pool.submit(func, *args)
+            self._inflight[name] = future
+            pool = self._pool
+        count('service_jobs_total', job=name[0])
+
+        def done(future):
+            with self._lock:
+                self._inflight.pop(name, None)
+                if isinstance(future.exception(), BrokenProcessPool):
+                    self._replace_pool(pool)
+            if future.exception() is not None:
+                self.last_error = future.exception()
+                self.last_error_at = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+            elif then is not None:
+                then(future.result())
+
+        future.add_done_callback(done)
+        return future
+
+    def _build(self, owner, repo_name, state):
+        key, group = (owner, repo_name, state['synced_at']), (owner, repo_name)
+        return self._submit(('frame',) + key, _repo_frame_job, owner, repo_name,
+                            then=lambda frame: self.frames.put(key, frame, group))
+
+    # the PR frame of `state`; unless `wait`, a repo's previous frame is served while
+    # the one of its newer sync is built
+    def _frame(self, owner, repo_name, state, wait=False):
+        key, group = (owner, repo_name, state['synced_at']), (owner, repo_name)
+        count('cache_calls_total', cache=self.frames.name)
+        frame = self.frames.get(key, group)
+        if frame is not None:
+            return frame
+        count('cache_misses_total', cache=self.frames.name)
+        future = self._build(owner, repo_name, state)
+        previous = None if wait else self.frames.latest(group)
+        if previous is not None:
+            return previous[1]
+        # stored here too, as `then` may not have run yet when result() returns
+        return self.frames.put(key, future.result(), group)
+
+    # (sync state, PR frame) per repo. Repos seen for the first time, or all of them on
+    # refresh, are synced before this returns, in parallel on the pool; stale ones are
+    # served from their last sync while a delta sync and the new frame are prepared
+    def load_repos(self, repos, refresh=False):
+        with timed('service_load_repos'):
+            states = {repo: self.store.sync_state(repo_key(*repo)) for repo in repos}
+            waiting = {}
+            for repo, state in states.items():
+                if state is None or refresh:
+                    waiting[repo] = self._submit(('sync',) + repo, _sync_job, *repo)
+                elif is_stale(state, self.max_age):
+                    self._submit(('sync',) + repo, _sync_job, *repo,
+                                 then=lambda state, repo=repo: self._build(*repo, state))
+            for repo, future in waiting.items():
+                states[repo] = future.result()
+            return [(states[repo], self._frame(*repo, states[repo], wait=repo in waiting)) for repo in repos]
+
+    # the cached result of `name`, whose last part is the revision. A new revision is
+    # computed in the background while the previous one is served, as the sheet is
+    # only polled for changes anyway; `force` waits for a fresh result
+    def _result(self, name, func, *args, force=False):
+        group = name[:-1]
+        count('cache_calls_total', cache=self.results.name)
+        result = None if force else self.results.get(name, group)
+        if result is not None:
+            return result
+        count('cache_misses_total', cache=self.results.name)
+        future = self._submit(name, func, *args, force, then=lambda result: self.results.put(name, result, group))
+        previous = None if force else self.results.latest(group)
+        return self.results.put(name, future.result(), group) if previous is None else previous[1]
+
+    # compute_sprint_metrics of a worksheet at `revision`, loading it through the store first
+    def sprint_metrics(self, spreadsheet_id, worksheet, revision, force=False):
+        with timed('service_sprint_metrics'):
+            name = ('sprint', spreadsheet_id, worksheet['title'], revision)
+            return self._result(name, _sprint_job, spreadsheet_id, worksheet, revision, self.max_age, force=force)
+
+    # load_sprint_trend of every worksheet at `revision`
+    def sprint_trend(self, spreadsheet_id, worksheets, revision, force=False):
+        with timed('service_sprint_trend'):
+            name = ('trend', spreadsheet_id, revision)
+            return self._result(name, _trend_job, spreadsheet_id, worksheets, revision, self.max_age, force=force)
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
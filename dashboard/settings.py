@@ -0,0 +1,47 @@
+import tomllib
+
+from dashboard.cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, FrameCache
+from dashboard.github_client import DEFAULT_MAX_WORKERS, GitHubClient
+from dashboard.rate_limit import DEFAULT_HOURLY_BUDGET
+from dashboard.sheets import SERVICE_ACCOUNT_KEYS, authorize
+from dashboard.store import DEFAULT_STORE_PATH, RepoStore
+
+
+# where Streamlit keeps its secrets; the headless entry points read the same file
+DEFAULT_SECRETS_PATH = '.streamlit/secrets.toml'
+
+
+# the [google] table of Streamlit's secrets file
+def load_secrets(path=DEFAULT_SECRETS_PATH):
+    with open(path, 'rb') as f:
+        return tomllib.load(f)['google']
+
+
+# GITHUB_MAX_WORKERS caps the requests in flight; GITHUB_HOURLY_BUDGET caps what the
+# client spends of each hourly window, paced only once that or GitHub's remainder runs low
+def github_client(secrets):
+    return GitHubClient(
+        secrets['USERNAME'],
+        secrets['TOKEN'],
+        max_workers=int(secrets.get('GITHUB_MAX_WORKERS', DEFAULT_MAX_WORKERS)),
+        hourly_budget=int(secrets.get('GITHUB_HOURLY_BUDGET', DEFAULT_HOURLY_BUDGET)),
+    )
+
+
+def repo_store(secrets):
+    return RepoStore(secrets.get('DATA_STORE_PATH', DEFAULT_STORE_PATH))
+
+
+def sheets_client(secrets):
+    return authorize({key: secrets[key] for key in SERVICE_ACCOUNT_KEYS})
+
+
+# CACHE_MAX_MB bounds the memory of each frame cache; shared caches also keep their
+# frames as Parquet under CACHE_DIR, which every server process on the host can read
+def frame_cache(secrets, name, ttl=None, shared=False):
+    return FrameCache(
+        name,
+        max_bytes=int(float(secrets.get('CACHE_MAX_MB', DEFAULT_MAX_BYTES / 2 ** 20)) * 2 ** 20),
+        ttl=ttl,
+        directory=secrets.get('CACHE_DIR', DEFAULT_CACHE_DIR) if shared else None,
+    )
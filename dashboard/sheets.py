@@ -0,0 +1,134 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google.oauth2.service_account import Credentials
+import gspread
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+from gspread.utils import absolute_range_name, rowcol_to_a1
+import pandas as pd
+
+from dashboard.instrument import count, registry, timed
+
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    # only for the sheet's modifiedTime, which keys the sheet cache
+    'https://www.googleapis.com/auth/drive.metadata.readonly',
+]
+
+SERVICE_ACCOUNT_KEYS = [
+    'type', 'project_id', 'private_key_id', 'private_key', 'client_email', 'client_id',
+    'auth_uri', 'token_uri', 'auth_provider_x509_cert_url', 'client_x509_cert_url', 'universe_domain',
+]
+
+
+# the only sheet columns the charts read
+SHEET_COLUMNS = ['TASK_NAME', 'ASSIGNEE', 'ESTIMATE', 'ACTUAL', 'RISKS']
+
+# ranges per values_batch_get request, and such requests in flight when a
+# spreadsheet needs several
+BATCH_RANGES = 100
+BATCH_WORKERS = 4
+
+
+# gspread's HTTP client, counting and timing every Sheets and Drive request
+class InstrumentedHTTPClient(HTTPClient):
+    def request(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().request(*args, **kwargs)
+        except APIError as e:
+            count('http_requests_total', service='sheets', status=e.response.status_code)
+            raise
+        finally:
+            registry.observe('http_request_seconds', time.perf_counter() - start, service='sheets')
+        count('http_requests_total', service='sheets', status=response.status_code)
+        count('http_response_bytes_total', len(response.content), service='sheets')
+        return response
+
+
+# parsing the private key and building the session is the expensive part, so callers
+# should build this once and share it; google-auth refreshes the access token on
+# the shared session whenever it expires
+def authorize(service_account_info):
+    credentials = Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
+    return gspread.authorize(credentials, http_client=InstrumentedHTTPClient)
+
+
+# title, id and size of every worksheet, from a single metadata request
+def fetch_worksheets(http_client, spreadsheet_id):
+    metadata = http_client.fetch_sheet_metadata(
+        spreadsheet_id, params={'fields': 'sheets.properties(sheetId,title,gridProperties)'}
+    )
+    return [
+        {
+            'id': sheet['properties']['sheetId'],
+            'title': sheet['properties']['title'],
+            'row_count': sheet['properties']['gridProperties']['rowCount'],
+        }
+        for sheet in metadata['sheets']
+    ]
+
+
+# Drive's modifiedTime for the spreadsheet, or None when Drive metadata isn't readable
+def fetch_revision(http_client, spreadsheet_id):
+    try:
+        return http_client.get_file_drive_metadata(spreadsheet_id)['modifiedTime']
+    except (APIError, KeyError):
+        return None
+
+
+def _column_letter(index):
+    return rowcol_to_a1(1, index + 1)[:-1]
+
+
+# every value range of `ranges`, in order, BATCH_RANGES to a request
+def _batch_get(http_client, spreadsheet_id, ranges, params=None):
+    chunks = [ranges[i:i + BATCH_RANGES] for i in range(0, len(ranges), BATCH_RANGES)]
+
+    def fetch(chunk):
+        return http_client.values_batch_get(spreadsheet_id, chunk, params=params)['valueRanges']
+
+    if len(chunks) <= 1:
+        return [value_range for chunk in chunks for value_range in fetch(chunk)]
+    with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(chunks))) as pool:
+        return [value_range for value_ranges in pool.map(fetch, chunks) for value_range in value_ranges]
+
+
+# cells are strings; object dtype keeps them so when a worksheet has no rows, which
+# pandas would otherwise type float64 and break the .str calls of the metrics
+def _column_frame(positions, values, columns):
+    if not positions:
+        return pd.DataFrame(columns=columns, dtype=object)
+    # the API drops trailing empty cells; pad like get_all_values does
+    length = max(len(column) for column in values)
+    return pd.DataFrame({
+        name: column + [''] * (length - len(column))
+        for (name, _), column in zip(positions, values)
+    }, dtype=object)
+
+
+# read just `columns` of several worksheets: one batched request for all their
+# header rows, then one for the wanted columns of all of them; {title: frame}
+@timed('load_sheets_columns')
+def load_sheets_columns(http_client, spreadsheet_id, worksheets, columns=SHEET_COLUMNS):
+    headers = _batch_get(http_client, spreadsheet_id, [absolute_range_name(ws['title'], '1:1') for ws in worksheets])
+    plans, ranges = [], []
+    for worksheet, header in zip(worksheets, headers):
+        header = header.get('values', [[]])
+        header = header[0] if header else []
+        positions = [(name, header.index(name)) for name in columns if name in header]
+        plans.append((worksheet['title'], positions))
+        last_row = worksheet['row_count']
+        ranges += [
+            absolute_range_name(worksheet['title'], f"{_column_letter(index)}2:{_column_letter(index)}{last_row}")
+            for _, index in positions
+        ]
+
+    value_ranges = _batch_get(http_client, spreadsheet_id, ranges, {'majorDimension': 'COLUMNS'}) if ranges else []
+    values = iter([value_range.get('values', [[]])[0] for value_range in value_ranges])
+    return {
+        title: _column_frame(positions, [next(values) for _ in positions], columns)
+        for title, positions in plans
+    }
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from dashboard.normalize import normalize_rows
+
+
+DEFAULT_STORE_PATH = os.path.join('.dashboard', 'github.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pulls (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    title TEXT,
+    state TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    merged_at TEXT,
+    head_ref TEXT,
+    PRIMARY KEY (repo, number)
+);
+CREATE TABLE IF NOT EXISTS comments (
+    repo TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    issue_number INTEGER NOT NULL,
+    created_at TEXT,
+    PRIMARY KEY (repo, id)
+);
+CREATE INDEX IF NOT EXISTS comments_by_issue ON comments (repo, issue_number);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT PRIMARY KEY,
+    synced_at TEXT,
+    pulls_etag TEXT,
+    comments_etag TEXT,
+    request_count INTEGER,
+    full_synced_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sheets (
+    spreadsheet_id TEXT NOT NULL,
+    worksheet TEXT NOT NULL,
+    revision TEXT,
+    loaded_at TEXT,
+    columns TEXT,
+    PRIMARY KEY (spreadsheet_id, worksheet)
+);
+CREATE TABLE IF NOT EXISTS sprint_summaries (
+    spreadsheet_id TEXT NOT NULL,
+    worksheet TEXT NOT NULL,
+    revision TEXT,
+    loaded_at TEXT,
+    content_hash TEXT,
+    summary TEXT,
+    PRIMARY KEY (spreadsheet_id, worksheet)
+);
+"""
+
+REPO_FRAME_QUERY = """
+SELECT p.number, p.title, p.head_ref, p.state, p.created_at, p.updated_at, p.merged_at,
+       MIN(c.created_at) AS first_comment_at, COUNT(c.id) AS comment_count
+FROM pulls p
+LEFT JOIN comments c ON c.repo = p.repo AND c.issue_number = p.number
+WHERE p.repo = ?
+GROUP BY p.number
+ORDER BY p.number DESC
+"""
+
+
+# local copy of PRs and comments per repo, and of warmed sheets, so a restart doesn't re-crawl GitHub
+class RepoStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            # stores from before PR branches were kept get the column, and their repos
+            # are crawled in full once more so every PR has its branch
+            if 'head_ref' not in [row[1] for row in conn.execute('PRAGMA table_info(pulls)')]:
+                with conn:
+                    conn.execute('ALTER TABLE pulls ADD COLUMN head_ref TEXT')
+                    conn.execute('DELETE FROM sync_state')
+            # and from before comments were re-listed in full now and then; NULL makes
+            # the next sync of each repo do that
+            if 'full_synced_at' not in [row[1] for row in conn.execute('PRAGMA table_info(sync_state)')]:
+                with conn:
+                    conn.execute('ALTER TABLE sync_state ADD COLUMN full_synced_at TEXT')
+
+    def _connect(self):
+        # a connection per call keeps the store safe to use from sync threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def sync_state(self, repo):
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM sync_state WHERE repo = ?', (repo,)).fetchone()
+        return dict(row) if row else None
+
+    def _insert_pulls(self, conn, repo, pulls):
+        conn.executemany('INSERT OR REPLACE INTO pulls VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+            (repo, pr['number'], pr['title'], pr['state'], pr['created_at'], pr['updated_at'], pr['merged_at'], pr['head']['ref'])
+            for pr in pulls
+        ])
+
+    def _insert_comments(self, conn, repo, comments):
+        conn.executemany('INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?)', [
+            (repo, comment['id'], comment['issue_number'], comment['created_at'])
+            for comment in comments
+        ])
+
+    # pages of a full crawl are written as they arrive; the repo only counts as
+    # synced once save_sync records its state
+    def save_pulls(self, repo, pulls):
+        with closing(self._connect()) as conn, conn:
+            self._insert_pulls(conn, repo, pulls)
+
+    def save_comments(self, repo, comments):
+        with closing(self._connect()) as conn, conn:
+            self._insert_comments(conn, repo, comments)
+
+    # with replace_comments, `comments` is the repo's full listing and replaces what is
+    # stored, so comments deleted upstream go too
+    def save_sync(self, repo, pulls, comments, state, replace_comments=False):
+        with closing(self._connect()) as conn, conn:
+            self._insert_pulls(conn, repo, pulls)
+            if replace_comments:
+                conn.execute('DELETE FROM comments WHERE repo = ?', (repo,))
+            self._insert_comments(conn, repo, comments)
+            conn.execute(
+                'INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?, ?)',
+                (repo, state['synced_at'], state.get('pulls_etag'), state.get('comments_etag'), state.get('request_count'),
+                 state.get('full_synced_at')),
+            )
+
+    def repo_frame(self, repo):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(REPO_FRAME_QUERY, (repo,)).fetchall()
+        return normalize_rows(rows)
+
+    # the sheet's revision and load time, without reading its cells
+    def sheet_state(self, spreadsheet_id, worksheet):
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                'SELECT revision, loaded_at FROM sheets WHERE spreadsheet_id = ? AND worksheet = ?',
+                (spreadsheet_id, worksheet),
+            ).fetchone()
+        return dict(row) if row else None
+
+    # {worksheet: state} for every stored worksheet of a spreadsheet
+    def sheet_states(self, spreadsheet_id):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT worksheet, revision, loaded_at FROM sheets WHERE spreadsheet_id = ?', (spreadsheet_id,)
+            ).fetchall()
+        return {worksheet: {'revision': revision, 'loaded_at': loaded_at} for worksheet, revision, loaded_at in rows}
+
+    def save_sheet(self, spreadsheet_id, worksheet, table, revision, loaded_at):
+        columns = json.dumps({name: table[name].tolist() for name in table.columns})
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sheets VALUES (?, ?, ?, ?, ?)',
+                (spreadsheet_id, worksheet, revision, loaded_at, columns),
+            )
+
+    def sheet_table(self, spreadsheet_id, worksheet):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT columns FROM sheets WHERE spreadsheet_id = ? AND worksheet = ?',
+                (spreadsheet_id, worksheet),
+            ).fetchone()
+        # object dtype, as load_sheets_columns builds it, also for a worksheet with no rows
+        return pd.DataFrame(json.loads(row[0]), dtype=object) if row else None
+
+    # {worksheet: {revision, loaded_at, content_hash, summary}}: the sprint summary of each
+    # worksheet, with the revision, load time and content hash of the copy it was computed from
+    def sprint_summaries(self, spreadsheet_id):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT worksheet, revision, loaded_at, content_hash, summary FROM sprint_summaries WHERE spreadsheet_id = ?',
+                (spreadsheet_id,),
+            ).fetchall()
+        return {
+            worksheet: {'revision': revision, 'loaded_at': loaded_at, 'content_hash': content_hash, 'summary': json.loads(summary)}
+            for worksheet, revision, loaded_at, content_hash, summary in rows
+        }
+
+    def save_sprint_summary(self, spreadsheet_id, worksheet, state, content_hash, summary):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sprint_summaries VALUES (?, ?, ?, ?, ?, ?)',
+                (spreadsheet_id, worksheet, state['revision'], state['loaded_at'], content_hash, json.dumps(summary)),
+            )
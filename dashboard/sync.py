@@ -0,0 +1,209 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from dashboard.github_client import PER_PAGE, issue_number
+from dashboard.instrument import timed
+
+
+# re-read this much history on every delta sync to absorb clock skew with GitHub
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# how old the local copy may get before a background delta sync is started
+DEFAULT_SYNC_INTERVAL = timedelta(minutes=5)
+
+# deltas only see comments that were added or edited, so one deleted upstream would
+# stay counted forever; this often a sync lists the repo's comments in full instead
+FULL_COMMENT_SYNC_INTERVAL = timedelta(days=1)
+
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def repo_key(owner, repo_name):
+    return f"{owner}/{repo_name}"
+
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+
+def _parse_time(value):
+    return datetime.strptime(value, TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+# only the fields the store keeps, so raw JSON is dropped page by page
+def _compact_pull(pr):
+    return {
+        **{name: pr[name] for name in ('number', 'title', 'state', 'created_at', 'updated_at', 'merged_at')},
+        'head': {'ref': pr['head']['ref']},
+    }
+
+
+def _compact_comment(comment):
+    return {'id': comment['id'], 'issue_number': issue_number(comment), 'created_at': comment['created_at']}
+
+
+def _probe(client, url, etag):
+    # conditional request: a 304 costs nothing against the rate limit
+    headers = {'If-None-Match': etag} if etag else None
+    response = client.get(url, headers=headers)
+    if response.status_code == 304:
+        return None, etag
+    return response, response.headers.get('ETag')
+
+
+def _updated_pulls(client, owner, repo_name, watermark, etag):
+    url = client.repo_url(owner, repo_name, f"pulls?state=all&sort=updated&direction=desc&per_page={PER_PAGE}")
+    response, etag = _probe(client, url, etag)
+    pulls = []
+    while response is not None:
+        page = response.json()
+        pulls += [pr for pr in page if pr['updated_at'] >= watermark]
+        # the listing is newest-first, so stop at the first page that reaches past the watermark
+        if not page or page[-1]['updated_at'] < watermark:
+            break
+        url = response.links.get('next', {}).get('url')
+        response = client.get(url) if url else None
+    return pulls, etag
+
+
+def _updated_comments(client, owner, repo_name, watermark, etag):
+    # the most recently updated comment changes whenever any comment does
+    probe_url = client.repo_url(owner, repo_name, "issues/comments?sort=updated&direction=desc&per_page=1")
+    response, etag = _probe(client, probe_url, etag)
+    if response is None:
+        return [], etag
+    return client.fetch_repo_comments(owner, repo_name, since=watermark), etag
+
+
+# a full crawl, stored page by page; yields a progress event per page, PR pages
+# carrying their compacted PRs so a caller can draw from the partial data
+def _crawl(client, store, owner, repo_name):
+    repo = repo_key(owner, repo_name)
+    for page, number, page_count in client.iter_paginated(client.pull_requests_url(owner, repo_name)):
+        pulls = [_compact_pull(pr) for pr in page]
+        store.save_pulls(repo, pulls)
+        yield {'repo': (owner, repo_name), 'stage': 'pulls', 'page': number, 'page_count': page_count, 'pulls': pulls}
+    for page, number, page_count in client.iter_paginated(client.repo_comments_url(owner, repo_name)):
+        store.save_comments(repo, [_compact_comment(comment) for comment in page])
+        yield {'repo': (owner, repo_name), 'stage': 'comments', 'page': number, 'page_count': page_count}
+
+
+# bring the local copy of a repo up to date, fully on first sight and by delta after that;
+# yields progress events while it crawls and a final 'done' event carrying the new sync state
+def iter_sync_repo(client, store, owner, repo_name):
+    repo = repo_key(owner, repo_name)
+    state = store.sync_state(repo) or {}
+    client = client.scoped()
+    started_at = _utc_now()
+    full_synced_at = state.get('full_synced_at')
+    full_comments = False
+
+    if state.get('synced_at'):
+        watermark = (_parse_time(state['synced_at']) - WATERMARK_OVERLAP).strftime(TIME_FORMAT)
+        pulls, pulls_etag = _updated_pulls(client, owner, repo_name, watermark, state.get('pulls_etag'))
+        full_comments = full_synced_at is None or started_at - _parse_time(full_synced_at) >= FULL_COMMENT_SYNC_INTERVAL
+        if full_comments:
+            comments, comments_etag = client.fetch_repo_comments(owner, repo_name), state.get('comments_etag')
+        else:
+            comments, comments_etag = _updated_comments(client, owner, repo_name, watermark, state.get('comments_etag'))
+    else:
+        yield from _crawl(client, store, owner, repo_name)
+        pulls, comments = [], []
+        pulls_etag = comments_etag = None
+    if full_comments or not state.get('synced_at'):
+        full_synced_at = started_at.strftime(TIME_FORMAT)
+
+    store.save_sync(repo, pulls, [_compact_comment(comment) for comment in comments], {
+        'synced_at': started_at.strftime(TIME_FORMAT),
+        'pulls_etag': pulls_etag,
+        'comments_etag': comments_etag,
+        'request_count': client.request_count,
+        'full_synced_at': full_synced_at,
+    }, replace_comments=full_comments)
+    yield {'repo': (owner, repo_name), 'stage': 'done', 'state': store.sync_state(repo)}
+
+
+def sync_repo(client, store, owner, repo_name):
+    for event in iter_sync_repo(client, store, owner, repo_name):
+        pass
+    return event['state']
+
+
+# sync many repos side by side, so the slowest repo rather than the sum sets the time;
+# the client's own limit still caps the requests in flight
+def sync_repos(client, store, repos, max_workers=32):
+    repos = list(repos)
+    if not repos:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(repos))) as pool:
+        return list(pool.map(lambda repo: sync_repo(client, store, *repo), repos))
+
+
+# iter_sync_repo over many repos side by side, their events interleaved as they happen
+def iter_sync_repos(client, store, repos, max_workers=32):
+    repos = list(repos)
+    if not repos:
+        return
+    events = queue.Queue()
+
+    def run(repo):
+        try:
+            for event in iter_sync_repo(client, store, *repo):
+                events.put(event)
+        except Exception as e:
+            events.put({'repo': repo, 'stage': 'error', 'error': e})
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(repos))) as pool:
+        for repo in repos:
+            pool.submit(run, repo)
+        for _ in repos:
+            while True:
+                event = events.get()
+                if event['stage'] == 'error':
+                    raise event['error']
+                yield event
+                if event['stage'] == 'done':
+                    break
+
+
+# share of a repo's sync an event marks as finished: PR pages fill the first half, comment pages the second
+def sync_progress(event):
+    if event['stage'] == 'done':
+        return 1.0
+    page_count = event['page_count'] or event['page'] + 1
+    return (0.5 if event['stage'] == 'comments' else 0.0) + 0.5 * event['page'] / page_count
+
+
+def is_stale(state, interval=DEFAULT_SYNC_INTERVAL):
+    return state is None or _utc_now() - _parse_time(state['synced_at']) >= interval
+
+
+# runs delta syncs off the request path, at most one per repo at a time
+class BackgroundSync:
+    def __init__(self, client, store, interval=DEFAULT_SYNC_INTERVAL):
+        self.client = client
+        self.store = store
+        self.interval = interval
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def request(self, owner, repo_name):
+        repo = repo_key(owner, repo_name)
+        if not is_stale(self.store.sync_state(repo), self.interval):
+            return False
+        with self._lock:
+            if repo in self._running:
+                return False
+            self._running.add(repo)
+        threading.Thread(target=self._run, args=(owner, repo_name), daemon=True).start()
+        return True
+
+    def _run(self, owner, repo_name):
+        try:
+            with timed('background_sync'):
+                sync_repo(self.client, self.store, owner, repo_name)
+        finally:
+            with self._lock:
+                self._running.discard(repo_key(owner, repo_name))
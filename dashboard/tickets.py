@@ -0,0 +1,92 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# letters-and-number tokens that look like ticket IDs but aren't: encodings, hashes,
+# standards, COVID-19
+NON_TICKET_KEYS = ['UTF', 'SHA', 'MD', 'COVID', 'ISO', 'RFC', 'AES', 'RSA', 'UTC', 'GMT', 'IPV', 'HTTP', 'TLS']
+
+
+# ticket IDs such as ABC-123 or TASK-42 in task names, PR titles and branch names
+# ("feature/abc-123-login"), matched on upper-cased text. The project key is two or
+# more letters; with `keys` (e.g. ["ABC", "TASK"]) only those count. A number going on
+# as a version ("lodash-4.17.21" in a dependabot branch) isn't a ticket
+def ticket_pattern(keys=None):
+    if keys:
+        key = '(?:' + '|'.join(re.escape(key.upper()) for key in keys) + ')'
+    else:
+        key = '(?!(?:' + '|'.join(NON_TICKET_KEYS) + ')-)[A-Z]{2,}'
+    return re.compile(r'(?<![A-Z0-9])' + key + r'-\d+(?!\d|\.\d)')
+
+
+TICKET_PATTERN = ticket_pattern()
+
+# what the joined frame keeps of each side
+TASK_COLUMNS = ['TASK_NAME', 'ESTIMATE', 'Actual', 'Dev Time Difference']
+PR_COLUMNS = [
+    'PR Number', 'PR Title', 'PR Branch', 'PR Opened Date', 'PR Merged Date',
+    'PR Duration', 'PR Comments Resolved Duration',
+]
+
+
+# one (row label, ticket) pair per distinct ID mentioned in `values`; a compiled
+# findall per string is about twice as fast as Series.str.extractall
+def ticket_mentions(values, pattern=TICKET_PATTERN):
+    found = [list(dict.fromkeys(pattern.findall(value.upper()))) if isinstance(value, str) else [] for value in values.tolist()]
+    counts = np.fromiter(map(len, found), dtype=np.int64, count=len(found))
+    return pd.DataFrame({
+        'row': np.repeat(values.index.to_numpy(), counts),
+        'Ticket': [ticket for tickets in found for ticket in tickets],
+    })
+
+
+# inverted index from ticket ID to the PR rows whose title or branch mention it; it
+# only changes with the PRs, so callers can build it once and pass it to link_tasks_to_prs
+def pr_ticket_index(repo_df, pattern=TICKET_PATTERN):
+    # title and branch searched as one string, so a ticket named in both is indexed once
+    texts = [f"{title} {branch or ''}" for title, branch in zip(repo_df['PR Title'].tolist(), repo_df['PR Branch'].tolist())]
+    return ticket_mentions(pd.Series(texts, index=repo_df.index, dtype=object), pattern)
+
+
+# every (task, PR) pair sharing a ticket ID: the task's tickets are looked up in the
+# PR index with one hash join, so the cost grows with tasks + PRs, not their product.
+# Expects sprint_metrics' tasks frame and a PR frame with add_pr_durations applied;
+# `index` must have been built with the same `pattern`. row_task and row_pr are the
+# row labels of the pair in `tasks` and `repo_df`
+def link_tasks_to_prs(tasks, repo_df, index=None, pattern=TICKET_PATTERN):
+    index = pr_ticket_index(repo_df, pattern) if index is None else index
+    pairs = ticket_mentions(tasks['TASK_NAME'], pattern).merge(index, on='Ticket', suffixes=('_task', '_pr'))
+    # the Repo column is there when several repos are loaded together
+    pr_columns = (['Repo'] if 'Repo' in repo_df else []) + PR_COLUMNS
+    linked = pd.concat([
+        pairs[['Ticket', 'row_task', 'row_pr']],
+        tasks.loc[pairs['row_task'], TASK_COLUMNS].reset_index(drop=True),
+        repo_df.loc[pairs['row_pr'], pr_columns].reset_index(drop=True),
+    ], axis=1)
+    return linked.sort_values(['Ticket', 'PR Number'], ignore_index=True)
+
+
+# one row per linked task, with every ticket it names: its estimate and actual next
+# to the PRs done for it, from the first PR opened to the last one merged, and the
+# mean time from first review comment to merge
+def task_pr_summary(linked):
+    hours = np.timedelta64(1, 'h')
+    tickets = linked.groupby('row_task', sort=False)['Ticket'].agg(lambda ticket: ', '.join(dict.fromkeys(ticket)))
+    # a PR naming two of the task's tickets is still one PR for it
+    grouped = linked.drop_duplicates(['row_task', 'row_pr']).groupby('row_task', sort=False)
+    summary = grouped.agg(
+        TASK_NAME=('TASK_NAME', 'first'),
+        ESTIMATE=('ESTIMATE', 'first'),
+        Actual=('Actual', 'first'),
+        **{'Dev Time Difference': ('Dev Time Difference', 'first')},
+        PRs=('PR Number', 'size'),
+        **{'Review Time': ('PR Comments Resolved Duration', 'mean')},
+        opened=('PR Opened Date', 'min'),
+        merged=('PR Merged Date', 'max'),
+    )
+    summary.insert(0, 'Ticket', tickets)
+    summary = summary.reset_index(drop=True)
+    summary['PR Duration'] = (summary.pop('merged') - summary.pop('opened')) / hours
+    return summary
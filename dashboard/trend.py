@@ -0,0 +1,58 @@
+import pandas as pd
+
+from dashboard.instrument import count
+from dashboard.metrics import METRIC_COLUMNS, compute_sprint_metrics, frame_hash, is_sprint_table, sprint_summary
+from dashboard.sync import DEFAULT_SYNC_INTERVAL
+from dashboard.warmup import warm_worksheets
+
+
+# every worksheet of a spreadsheet is a sprint; the trend is one row of sprint_summary
+# numbers per worksheet, in worksheet order
+
+TREND_COLUMNS = ['Sprint', 'total_estimate', 'total_actual', 'velocity', 'time_difference', 'tasks', 'unfinished_tasks', 'risks']
+
+
+def _summarize(table):
+    if not is_sprint_table(table):
+        return None
+    return sprint_summary(compute_sprint_metrics(table))
+
+
+# {title: summary} for the stored worksheets, in worksheet order. A summary is only
+# recomputed when its worksheet was reloaded since, and then only when the metric
+# columns actually changed; Drive's revision covers the whole spreadsheet, so one
+# edited sprint reloads them all
+def update_sprint_summaries(store, spreadsheet_id, worksheets):
+    states = store.sheet_states(spreadsheet_id)
+    known = store.sprint_summaries(spreadsheet_id)
+    summaries = {}
+    for worksheet in worksheets:
+        title = worksheet['title']
+        state = states.get(title)
+        if state is None:
+            continue
+        entry = known.get(title)
+        if entry is None or (entry['revision'], entry['loaded_at']) != (state['revision'], state['loaded_at']):
+            table = store.sheet_table(spreadsheet_id, title)
+            content_hash = frame_hash(table) if set(METRIC_COLUMNS) <= set(table.columns) else None
+            if entry is None or entry['content_hash'] != content_hash:
+                entry = {'summary': _summarize(table)}
+                count('sprint_summaries_computed_total')
+            store.save_sprint_summary(spreadsheet_id, title, state, content_hash, entry['summary'])
+        if entry['summary'] is not None:
+            summaries[title] = entry['summary']
+    return summaries
+
+
+def sprint_trend_frame(summaries):
+    return pd.DataFrame(
+        [{'Sprint': title, **summary} for title, summary in summaries.items()],
+        columns=TREND_COLUMNS,
+    )
+
+
+# the trend of every worksheet: stale ones are reloaded in one batch first, then
+# only new or changed sprints are summarized again
+def load_sprint_trend(http_client, store, spreadsheet_id, worksheets, revision, max_age=DEFAULT_SYNC_INTERVAL, force=False):
+    warm_worksheets(http_client, store, spreadsheet_id, worksheets, revision, max_age, force)
+    return sprint_trend_frame(update_sprint_summaries(store, spreadsheet_id, worksheets))
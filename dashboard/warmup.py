@@ -0,0 +1,194 @@
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from gspread.utils import extract_id_from_url
+
+from dashboard.repos import parse_repo_input
+from dashboard.settings import DEFAULT_SECRETS_PATH, github_client, load_secrets, repo_store, sheets_client
+from dashboard.sheets import fetch_revision, fetch_worksheets, load_sheets_columns
+from dashboard.sync import DEFAULT_SYNC_INTERVAL, TIME_FORMAT, is_stale, repo_key, sync_repos
+
+
+# how often the warm-up scheduler refreshes its repos and sheets
+DEFAULT_WARMUP_INTERVAL = DEFAULT_SYNC_INTERVAL
+
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+
+# "5 min ago" style age of a TIME_FORMAT timestamp, for freshness captions
+def describe_age(timestamp):
+    seconds = (_utc_now() - datetime.strptime(timestamp, TIME_FORMAT).replace(tzinfo=timezone.utc)).total_seconds()
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h ago"
+    return f"{int(seconds // 86400)} days ago"
+
+
+# sync the repos whose local copy is older than `interval`, or all of them when forced
+def warm_repos(client, store, repos, interval=DEFAULT_WARMUP_INTERVAL, force=False):
+    repos = [repo for repo in repos if force or is_stale(store.sync_state(repo_key(*repo)), interval)]
+    return sync_repos(client, store, repos)
+
+
+# a stored worksheet is reloaded unless it is already at `revision`; without a
+# revision (no Drive access) once it is older than `max_age`
+def _needs_load(state, revision, max_age, force):
+    if force or not state:
+        return True
+    if revision is not None:
+        return state['revision'] != revision
+    return is_stale({'synced_at': state['loaded_at']}, max_age)
+
+
+# store the worksheets that need it, all read in the same batched requests; returns
+# the titles of those (re)loaded
+def warm_worksheets(http_client, store, spreadsheet_id, worksheets, revision, max_age=DEFAULT_WARMUP_INTERVAL, force=False):
+    states = store.sheet_states(spreadsheet_id)
+    stale = [worksheet for worksheet in worksheets if _needs_load(states.get(worksheet['title']), revision, max_age, force)]
+    if not stale:
+        return []
+    loaded_at = _utc_now().strftime(TIME_FORMAT)
+    for title, table in load_sheets_columns(http_client, spreadsheet_id, stale).items():
+        store.save_sheet(spreadsheet_id, title, table, revision, loaded_at)
+    return [worksheet['title'] for worksheet in stale]
+
+
+# store one worksheet unless the stored copy is current; True when it was (re)loaded
+def warm_worksheet(http_client, store, spreadsheet_id, worksheet, revision, max_age=DEFAULT_WARMUP_INTERVAL, force=False):
+    return bool(warm_worksheets(http_client, store, spreadsheet_id, [worksheet], revision, max_age, force))
+
+
+# every worksheet of a spreadsheet; returns how many were (re)loaded
+def warm_spreadsheet(http_client, store, spreadsheet_id, max_age=DEFAULT_WARMUP_INTERVAL, force=False):
+    revision = fetch_revision(http_client, spreadsheet_id)
+    worksheets = fetch_worksheets(http_client, spreadsheet_id)
+    return len(warm_worksheets(http_client, store, spreadsheet_id, worksheets, revision, max_age, force))
+
+
+# keeps a fixed list of repos and spreadsheets fresh in the store from a daemon thread,
+# so the first viewer reads a precomputed copy instead of waiting on a crawl
+class WarmupScheduler:
+    def __init__(self, client, store, repos=(), spreadsheet_ids=(), http_client=None, interval=DEFAULT_WARMUP_INTERVAL,
+                 orgs=()):
+        self.client = client
+        self.store = store
+        self.repos = list(repos)
+        self.orgs = list(orgs)
+        self._configured_repos = list(repos)
+        self.spreadsheet_ids = list(spreadsheet_ids)
+        self.http_client = http_client
+        self.interval = interval
+        self.last_run = None
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def run_once(self, force=False):
+        # the lock keeps a refresh button and the timer from warming the same data twice
+        with self._lock:
+            try:
+                # orgs are listed every round, on this thread, so new repos are picked up
+                # and a slow or failing listing never holds up a page
+                if self.orgs:
+                    self.repos = list(dict.fromkeys(
+                        self._configured_repos + [(org, name) for org in self.orgs for name in self.client.list_repos(org)]
+                    ))
+                warm_repos(self.client, self.store, self.repos, self.interval, force)
+                if self.http_client is not None:
+                    for spreadsheet_id in self.spreadsheet_ids:
+                        warm_spreadsheet(self.http_client, self.store, spreadsheet_id, self.interval, force)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                raise
+            finally:
+                self.last_run = _utc_now().strftime(TIME_FORMAT)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass  # kept in last_error; the next round retries
+            self._wake.wait(self.interval.total_seconds())
+            self._wake.clear()
+
+
+# the warm-up targets named in the secrets: WARM_REPOS is repo input text like the
+# dashboard's, WARM_SHEETS a list of sheet URLs
+def warmup_targets(secrets):
+    repos, orgs = parse_repo_input(secrets.get('WARM_REPOS', ''), secrets['USERNAME'])
+    spreadsheet_ids = [extract_id_from_url(url) for url in secrets.get('WARM_SHEETS', [])]
+    return repos, orgs, spreadsheet_ids
+
+
+def add_arguments(parser):
+    parser.add_argument('--secrets', default=DEFAULT_SECRETS_PATH, help="Streamlit secrets file with the [google] table")
+    parser.add_argument('--repos', help="repos to warm, in the dashboard's input format (default: WARM_REPOS)")
+    parser.add_argument('--sheet', action='append', default=[], help="sheet URL to warm, repeatable (default: WARM_SHEETS)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_WARMUP_INTERVAL.total_seconds() / 60, help="minutes between rounds")
+    parser.add_argument('--once', action='store_true', help="warm everything once and exit")
+    parser.add_argument('--force', action='store_true', help="reload even what is still fresh")
+
+
+def run(args):
+    secrets = load_secrets(args.secrets)
+    if args.repos is not None:
+        secrets['WARM_REPOS'] = args.repos
+    if args.sheet:
+        secrets['WARM_SHEETS'] = args.sheet
+    repos, orgs, spreadsheet_ids = warmup_targets(secrets)
+
+    client = github_client(secrets)
+    store = repo_store(secrets)
+    http_client = sheets_client(secrets).http_client if spreadsheet_ids else None
+    scheduler = WarmupScheduler(
+        client, store, dict.fromkeys(repos), spreadsheet_ids, http_client, timedelta(minutes=args.interval), orgs
+    )
+
+    while True:
+        start = time.perf_counter()
+        try:
+            scheduler.run_once(force=args.force)
+        except Exception as e:
+            if args.once:
+                raise
+            print(f"warm-up round failed: {e}", flush=True)
+        else:
+            print(
+                f"warmed {len(scheduler.repos)} repos and {len(spreadsheet_ids)} spreadsheets "
+                f"in {time.perf_counter() - start:.1f}s ({client.request_count} GitHub requests so far)",
+                flush=True,
+            )
+        if args.once:
+            return
+        time.sleep(scheduler.interval.total_seconds())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep repos and sheets warm in the dashboard's local store.")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
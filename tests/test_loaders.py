@@ -0,0 +1,18 @@
+import pandas as pd
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient
+from dashboard.graphql_loader import fetch_repo_graphql
+from dashboard.store import RepoStore
+from dashboard.sync import repo_key, sync_repo
+
+
+def test_graphql_loader_matches_the_rest_store_frame(tmp_path):
+    # more PRs than one GraphQL page, so the per-page normalizing is covered too
+    with MockGitHub(make_repo(250)) as server:
+        client = GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=None)
+        store = RepoStore(str(tmp_path / 'github.sqlite3'))
+        sync_repo(client, store, 'owner', 'repo')
+        graphql = fetch_repo_graphql(client, 'owner', 'repo')
+
+    pd.testing.assert_frame_equal(store.repo_frame(repo_key('owner', 'repo')), graphql)
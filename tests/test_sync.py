@@ -0,0 +1,115 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+from benchmarks.mock_github import MockGitHub, make_repo
+from dashboard.github_client import GitHubClient
+from dashboard.store import RepoStore
+from dashboard.sync import repo_key, sync_repo
+
+REPO = repo_key('owner', 'repo')
+
+
+@pytest.fixture
+def server():
+    with MockGitHub(make_repo(250)) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return GitHubClient('owner', 'token', base_url=server.base_url, hourly_budget=None)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RepoStore(str(tmp_path / 'github.sqlite3'))
+
+
+def comment_counts(store):
+    frame = store.repo_frame(REPO)
+    return dict(zip(frame['PR Number'], frame['total Comments in Pr']))
+
+
+def test_unchanged_repo_costs_two_conditional_requests_and_writes_nothing(server, client, store):
+    sync_repo(client, store, 'owner', 'repo')
+    # a full crawl keeps no ETags; the first delta after it collects them
+    sync_repo(client, store, 'owner', 'repo')
+    writes = []
+    save_sync = store.save_sync
+    store.save_sync = lambda repo, pulls, comments, state, **kwargs: (
+        writes.append((pulls, comments)), save_sync(repo, pulls, comments, state, **kwargs)
+    )
+
+    before = server.request_count
+    state = sync_repo(client, store, 'owner', 'repo')
+
+    assert server.request_count - before == 2
+    assert state['request_count'] == 2
+    assert writes == [([], [])]
+
+
+def test_changed_pr_is_picked_up_at_the_watermark(server, client, store):
+    sync_repo(client, store, 'owner', 'repo')
+    server.touch(7)
+    updated_at = next(pr['updated_at'] for pr in server.repo['prs'] if pr['number'] == 7)
+
+    sync_repo(client, store, 'owner', 'repo')
+
+    frame = store.repo_frame(REPO).set_index('PR Number')
+    assert frame.loc[7, 'Updated At'] == pd.Timestamp(updated_at.rstrip('Z'))
+
+
+def test_new_comment_is_counted_once(server, client, store):
+    sync_repo(client, store, 'owner', 'repo')
+    before = comment_counts(store)
+    server.touch(7)
+
+    sync_repo(client, store, 'owner', 'repo')
+    # the next delta re-reads the overlap before the watermark, comment included
+    sync_repo(client, store, 'owner', 'repo')
+
+    after = comment_counts(store)
+    assert after[7] == before[7] + 1
+    assert {number: count for number, count in after.items() if number != 7} == {
+        number: count for number, count in before.items() if number != 7
+    }
+
+
+def test_deleted_comment_goes_with_the_next_full_comment_listing(server, client, store):
+    sync_repo(client, store, 'owner', 'repo')
+    server.repo['comments'][3].pop()
+    server.touch(8)  # a change upstream, and fresh listings
+
+    sync_repo(client, store, 'owner', 'repo')
+    assert comment_counts(store)[3] == 3
+
+    with closing(sqlite3.connect(store.path)) as conn, conn:
+        conn.execute("UPDATE sync_state SET full_synced_at = '2000-01-01T00:00:00Z'")
+    sync_repo(client, store, 'owner', 'repo')
+
+    assert comment_counts(store)[3] == 2
+
+
+def test_store_without_branches_is_migrated_and_crawled_again(client, tmp_path):
+    path = str(tmp_path / 'github.sqlite3')
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.executescript("""
+            CREATE TABLE pulls (repo TEXT NOT NULL, number INTEGER NOT NULL, title TEXT, state TEXT,
+                                created_at TEXT, updated_at TEXT, merged_at TEXT, PRIMARY KEY (repo, number));
+            CREATE TABLE sync_state (repo TEXT PRIMARY KEY, synced_at TEXT, pulls_etag TEXT,
+                                     comments_etag TEXT, request_count INTEGER);
+            INSERT INTO sync_state VALUES ('owner/repo', '2030-01-01T00:00:00Z', '"etag"', '"etag"', 3);
+        """)
+
+    store = RepoStore(path)
+    assert store.sync_state(REPO) is None
+
+    sync_repo(client, store, 'owner', 'repo')
+    frame = store.repo_frame(REPO)
+    assert len(frame) == 250
+    assert frame['PR Branch'].notna().all()
+    assert store.sync_state(REPO)['full_synced_at'] is not None
+
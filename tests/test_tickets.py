@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from benchmarks.mock_github import make_repo
+from dashboard.metrics import compute_sprint_metrics
+from dashboard.normalize import add_pr_durations, normalize_pulls
+from dashboard.tickets import TICKET_PATTERN, link_tasks_to_prs, task_pr_summary, ticket_pattern
+
+HEADER = ['TASK_NAME', 'ASSIGNEE', 'ESTIMATE', 'ACTUAL', 'RISKS']
+
+
+def tasks_frame(names):
+    table = pd.DataFrame([[name, 'asha', '3', '4', 'Risk'] for name in names], columns=HEADER, dtype=object)
+    return compute_sprint_metrics(table)['tasks']
+
+
+@pytest.fixture
+def repo_df():
+    # PR n is titled "PR n: synthetic change" on branch feature/TASK-n-synthetic-change
+    return add_pr_durations(normalize_pulls([make_repo(5, comments_per_pr=0)['prs']]))
+
+
+@pytest.mark.parametrize('text', [
+    'Fix UTF-8 decoding',
+    'COVID-19 dashboard',
+    'Verify SHA-256 sums',
+    'dependabot/npm_and_yarn/lodash-4.17.21',
+    'X-1 single-letter key',
+    'A1-5 key with a digit',
+])
+def test_non_tickets_do_not_match(text):
+    assert TICKET_PATTERN.findall(text.upper()) == []
+
+
+@pytest.mark.parametrize('text, tickets', [
+    ('feature/abc-123-login', ['ABC-123']),
+    ('TASK-42 done', ['TASK-42']),
+    ('fix ABC-12, DEF-3', ['ABC-12', 'DEF-3']),
+    ('PROJ-7.', ['PROJ-7']),
+])
+def test_tickets_match(text, tickets):
+    assert TICKET_PATTERN.findall(text.upper()) == tickets
+
+
+def test_keyed_pattern_only_matches_its_keys():
+    pattern = ticket_pattern(['abc', 'TASK'])
+    assert pattern.findall('FIX ABC-12, DEF-3 AND TASK-4') == ['ABC-12', 'TASK-4']
+    assert pattern.findall('XABC-1') == []
+
+
+def test_task_naming_two_tickets_is_one_row(repo_df):
+    tasks = tasks_frame(['TASK-2 and TASK-1', 'nothing to link'])
+    summary = task_pr_summary(link_tasks_to_prs(tasks, repo_df))
+    assert summary['TASK_NAME'].tolist() == ['TASK-2 and TASK-1']
+    assert summary['Ticket'].tolist() == ['TASK-1, TASK-2']
+    assert summary['PRs'].tolist() == [2]
+
+
+def test_tasks_with_the_same_name_stay_apart(repo_df):
+    summary = task_pr_summary(link_tasks_to_prs(tasks_frame(['TASK-3 login', 'TASK-3 login']), repo_df))
+    assert len(summary) == 2
+
+
+def test_nothing_linked_gives_an_empty_summary(repo_df):
+    summary = task_pr_summary(link_tasks_to_prs(tasks_frame(['no ticket here', 'UTF-8 again']), repo_df))
+    assert summary.empty
+    assert 'Ticket' in summary.columns and 'PR Duration' in summary.columns